@@ -328,7 +328,7 @@ class HelloWorldInput(BaseModel):
         description="The message to display in the widget",
     )
 
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = HelloWorldInput
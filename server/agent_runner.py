@@ -19,13 +19,23 @@ if not env_path.exists():
 load_dotenv(env_path)
 
 import asyncio
-import json
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, suppress
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
 
-from agents import Agent, Runner
-from agents.mcp import MCPServerStreamableHttp
-from agents.model_settings import ModelSettings
+import httpx
+import orjson
+
+# The Agents SDK and OpenAI client are heavy to import and only needed once a
+# prompt is run, so they are imported inside the functions that use them.
+# Importing this module for its dataclasses stays cheap.
+if TYPE_CHECKING:
+    from agents import Agent
+    from agents.mcp import MCPServerStreamableHttp
+    from agents.model_settings import ModelSettings
+    from openai import AsyncOpenAI
 
 
 # =============================================================================
@@ -38,14 +48,16 @@ def load_config() -> dict:
     default_config = {
         "model": "gpt-4o-mini",
         "mcp_server_url": "http://localhost:8000/mcp",
-        "max_conversation_history": 20
+        "max_conversation_history": 20,
+        "tools_cache_ttl_seconds": 60,
+        "max_conversations": 10000,
+        "conversation_ttl_seconds": 3600,
     }
 
     if config_path.exists():
         try:
-            with open(config_path, "r") as f:
-                return {**default_config, **json.load(f)}
-        except (json.JSONDecodeError, IOError):
+            return {**default_config, **orjson.loads(config_path.read_bytes())}
+        except (orjson.JSONDecodeError, OSError):
             pass
     return default_config
 
@@ -55,6 +67,21 @@ CONFIG = load_config()
 MODEL = CONFIG["model"]
 MCP_SERVER_URL = CONFIG["mcp_server_url"]
 MAX_CONVERSATION_HISTORY = CONFIG["max_conversation_history"]
+TOOLS_CACHE_TTL_SECONDS = CONFIG["tools_cache_ttl_seconds"]
+MAX_CONVERSATIONS = CONFIG["max_conversations"]
+CONVERSATION_TTL_SECONDS = CONFIG["conversation_ttl_seconds"]
+
+# Connection pool for the shared OpenAI client (httpx defaults to 100 connections)
+HTTP_MAX_CONNECTIONS = 2000
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 1500
+HTTP_TIMEOUT_SECONDS = 120.0
+
+# HTTP/2 for the MCP transport needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401 - httpx raises ImportError on http2=True without it
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
 # =============================================================================
@@ -78,43 +105,82 @@ class AgentResponse:
 
 
 # =============================================================================
-# WIDGET DATA (imported from main.py at runtime)
+# WIDGET DATA (from the widgets registry, imported once)
 # =============================================================================
 
+try:
+    from widgets import WIDGETS_BY_ID
+    from widgets._base import load_widget_html
+except ImportError:
+    WIDGETS_BY_ID = {}
+    load_widget_html = None
+
+# Tool names arrive from the model and may be misspelled; reject unknown ones early
+WIDGET_TOOL_NAMES: frozenset[str] = frozenset(WIDGETS_BY_ID)
+
+
 def get_widget_html(tool_name: str) -> str:
-    """Get the HTML for a widget by tool name."""
-    try:
-        from main import WIDGETS_BY_ID, load_widget_html
-        widget = WIDGETS_BY_ID.get(tool_name)
-        if widget:
-            return load_widget_html(widget.component_name)
-    except ImportError:
-        pass
-    return ""
+    """Get the HTML for a widget by tool name.
+
+    load_widget_html keeps its own per-component cache (invalidated when the
+    built file changes), so repeat calls don't touch the file contents.
+    """
+    if tool_name not in WIDGET_TOOL_NAMES or load_widget_html is None:
+        return ""
+    return load_widget_html(WIDGETS_BY_ID[tool_name].component_name)
 
 
 # =============================================================================
 # MCP SERVER & AGENT
 # =============================================================================
 
+def create_mcp_http_client(
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    auth: Optional[httpx.Auth] = None,
+) -> httpx.AsyncClient:
+    """HTTP client for the MCP transport.
+
+    HTTP/2 is negotiated over TLS, so against an https MCP endpoint all
+    concurrent tool calls share one multiplexed connection. It is only
+    enabled when h2 is installed (httpx[http2]); plain-http endpoints (like
+    the local uvicorn server) keep using HTTP/1.1.
+    """
+    kwargs: Dict[str, Any] = {
+        "http2": HTTP2_AVAILABLE and MCP_SERVER_URL.startswith("https://"),
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    }
+    # Passing None would disable httpx's defaults, so only forward what was given
+    if headers is not None:
+        kwargs["headers"] = headers
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    if auth is not None:
+        kwargs["auth"] = auth
+    return httpx.AsyncClient(**kwargs)
+
+
 async def create_mcp_server() -> MCPServerStreamableHttp:
     """Create MCP server connection."""
+    from agents.mcp import MCPServerStreamableHttp
+
     return MCPServerStreamableHttp(
         name="mcp-widgets",
         params={
             "url": MCP_SERVER_URL,
+            "httpx_client_factory": create_mcp_http_client,
         },
         cache_tools_list=True,  # Cache tools for better performance
         use_structured_content=True,  # Get structuredContent from MCP responses
     )
 
 
-def create_agent(mcp_server: MCPServerStreamableHttp) -> Agent:
-    """Create an agent connected to the MCP server."""
-    return Agent(
-        name="Widget Assistant",
-        model=MODEL,
-        instructions="""You are a helpful assistant that can display interactive widgets.
+# System prompt. Kept static (no interpolation) so the prefix sent to the
+# model is byte-identical on every turn and OpenAI's prompt caching applies.
+INSTRUCTIONS = """You are a helpful assistant that can display interactive widgets.
 
 When the user asks to see something visual, use the appropriate tool:
 - show_card: For simple interactive card displays
@@ -127,37 +193,237 @@ When the user asks to see something visual, use the appropriate tool:
 - show_shop: For shopping cart and e-commerce
 
 Always use a tool when the user asks to see, show, or display something visual.
-After calling a tool, provide a brief helpful response about what you're showing.""",
+After calling a tool, provide a brief helpful response about what you're showing."""
+
+_model_settings: Optional[ModelSettings] = None
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def get_model_settings() -> ModelSettings:
+    """Return the shared ModelSettings, created on first use."""
+    global _model_settings
+    if _model_settings is None:
+        from agents.model_settings import ModelSettings
+
+        # The SDK runs all tool calls from one model response concurrently
+        _model_settings = ModelSettings(tool_choice="auto", parallel_tool_calls=True)
+    return _model_settings
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Return the shared OpenAI client.
+
+    Created on first use (so importing this module doesn't require an API key)
+    and reused afterwards, so every run shares one keep-alive connection pool.
+    """
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+
+        _openai_client = AsyncOpenAI(http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS),
+        ))
+    return _openai_client
+
+
+def create_agent(mcp_server: MCPServerStreamableHttp) -> Agent:
+    """Create an agent connected to the MCP server."""
+    from agents import Agent, OpenAIChatCompletionsModel
+
+    return Agent(
+        name="Widget Assistant",
+        model=OpenAIChatCompletionsModel(model=MODEL, openai_client=get_openai_client()),
+        instructions=INSTRUCTIONS,
         mcp_servers=[mcp_server],
-        model_settings=ModelSettings(tool_choice="auto"),
+        model_settings=get_model_settings(),
     )
 
 
+@dataclass(eq=False)
+class _McpSession:
+    """The shared MCP connection, the agent bound to it, and its active runs."""
+    server: MCPServerStreamableHttp
+    agent: Agent
+    users: int = 0
+    retired: bool = False
+
+
+# Shared MCP connection and agent, created lazily on the first prompt.
+# Reusing them avoids the initialize/list_tools handshake on every request.
+_session: Optional[_McpSession] = None
+_session_lock = asyncio.Lock()
+_tools_cached_at = 0.0
+
+
+def is_mcp_transport_error(exc: BaseException) -> bool:
+    """Return True if exc (or anything it wraps) means the MCP connection is gone.
+
+    The SDK wraps transport failures in UserError, so the cause/context chain
+    and exception groups are searched. Model errors (rate limits, auth,
+    MaxTurnsExceeded) and tool errors don't match, so they leave the shared
+    session alone.
+    """
+    import anyio
+    from mcp.shared.exceptions import McpError
+    from mcp.types import CONNECTION_CLOSED
+
+    pending = [exc]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, (httpx.TransportError, anyio.ClosedResourceError, anyio.BrokenResourceError)):
+            return True
+        if isinstance(current, McpError) and current.error.code == CONNECTION_CLOSED:
+            return True
+        if isinstance(current, BaseExceptionGroup):
+            pending.extend(current.exceptions)
+        pending.extend((current.__cause__, current.__context__))
+    return False
+
+
+async def _acquire_session() -> _McpSession:
+    """Return the shared session, connecting on first use, and count the caller in.
+
+    The tools list is cached by the SDK (cache_tools_list=True), so runs skip
+    the tools/list request; the cache is dropped every TOOLS_CACHE_TTL_SECONDS
+    so tool changes on the server are eventually picked up.
+    """
+    global _session, _tools_cached_at
+    async with _session_lock:
+        now = time.monotonic()
+        if _session is None:
+            server = await create_mcp_server()
+            try:
+                await server.connect()
+                agent = create_agent(server)
+            except BaseException:
+                # Don't leave a half-built session's connection behind
+                # (e.g. create_agent fails when OPENAI_API_KEY is unset)
+                with suppress(Exception):
+                    await server.cleanup()
+                raise
+            _session = _McpSession(server=server, agent=agent)
+            _tools_cached_at = now
+        elif now - _tools_cached_at > TOOLS_CACHE_TTL_SECONDS:
+            _session.server.invalidate_tools_cache()
+            _tools_cached_at = now
+        _session.users += 1
+        return _session
+
+
+async def _release_session(session: _McpSession, broken: bool = False):
+    """Count the caller out; close a retired session once its last run is done.
+
+    A broken session is detached straight away so the next run reconnects,
+    but runs still using it are left to finish (or fail) on their own.
+    """
+    global _session
+    async with _session_lock:
+        session.users -= 1
+        if broken and _session is session:
+            _session = None
+            session.retired = True
+        if not (session.retired and session.users == 0):
+            return
+    # The connection is already broken; a failing cleanup must not mask the
+    # error that retired it
+    with suppress(Exception):
+        await session.server.cleanup()
+
+
+@asynccontextmanager
+async def mcp_session() -> AsyncIterator[_McpSession]:
+    """Use the shared MCP session for one run."""
+    session = await _acquire_session()
+    broken = False
+    try:
+        yield session
+    except Exception as exc:
+        broken = is_mcp_transport_error(exc)
+        raise
+    finally:
+        await _release_session(session, broken)
+
+
+async def close_mcp_server():
+    """Close the shared MCP server connection (called on server shutdown)."""
+    global _session
+    async with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.retired = True
+        await session.server.cleanup()
+
+
+async def shutdown():
+    """Release the shared MCP session and OpenAI HTTP connections."""
+    global _openai_client
+    await close_mcp_server()
+    if _openai_client is not None:
+        client, _openai_client = _openai_client, None
+        await client.close()
+
+
 # =============================================================================
 # CONVERSATION MANAGER
 # =============================================================================
 
 class ConversationManager:
-    """Manages conversation history for context."""
+    """Manages conversation history for context.
+
+    Each conversation keeps its last MAX_CONVERSATION_HISTORY messages.
+    Conversations are kept in least-recently-used order: at most
+    MAX_CONVERSATIONS are stored, and ones idle for longer than
+    CONVERSATION_TTL_SECONDS are dropped, so a long-running server doesn't
+    accumulate every conversation_id it has ever seen.
+    """
 
     def __init__(self):
-        self.conversations: Dict[str, List[Dict[str, str]]] = {}
+        self.conversations: OrderedDict[str, Deque[Dict[str, str]]] = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+
+    def _entries(self, conversation_id: str) -> Deque[Dict[str, str]]:
+        now = time.monotonic()
+        self._expire(now)
+        history = self.conversations.get(conversation_id)
+        if history is None:
+            # Bounded deque: appends past the limit drop the oldest message
+            history = self.conversations[conversation_id] = deque(maxlen=MAX_CONVERSATION_HISTORY)
+            while len(self.conversations) > MAX_CONVERSATIONS:
+                self._drop(next(iter(self.conversations)))
+        else:
+            self.conversations.move_to_end(conversation_id)
+        self._last_access[conversation_id] = now
+        return history
+
+    def _expire(self, now: float):
+        # Oldest-accessed conversations are at the front, so stop at the first fresh one
+        while self.conversations:
+            oldest = next(iter(self.conversations))
+            if now - self._last_access[oldest] <= CONVERSATION_TTL_SECONDS:
+                break
+            self._drop(oldest)
+
+    def _drop(self, conversation_id: str):
+        del self.conversations[conversation_id]
+        del self._last_access[conversation_id]
 
     def get_history(self, conversation_id: str) -> List[Dict[str, str]]:
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
-        return self.conversations[conversation_id]
+        return list(self._entries(conversation_id))
 
     def add_message(self, conversation_id: str, role: str, content: str):
-        history = self.get_history(conversation_id)
-        history.append({"role": role, "content": content})
-        # Keep last N messages to avoid token limits
-        if len(history) > MAX_CONVERSATION_HISTORY:
-            self.conversations[conversation_id] = history[-MAX_CONVERSATION_HISTORY:]
+        self._entries(conversation_id).append({"role": role, "content": content})
 
     def clear(self, conversation_id: str):
         if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+            self._drop(conversation_id)
 
 
 # Global conversation manager
@@ -168,6 +434,24 @@ conversation_manager = ConversationManager()
 # AGENT RUNNER
 # =============================================================================
 
+def parse_tool_output(output: Any) -> Dict[str, Any]:
+    """Extract the widget data from a tool output (JSON string or dict).
+
+    Returns structuredContent when present, otherwise the whole object.
+    Plain-text outputs are skipped without attempting a JSON parse.
+    """
+    if isinstance(output, str):
+        if not output.lstrip().startswith("{"):
+            return {}
+        try:
+            output = orjson.loads(output)
+        except orjson.JSONDecodeError:
+            return {}
+    if not isinstance(output, dict):
+        return {}
+    return output.get('structuredContent', output)
+
+
 async def run_agent(
     prompt: str,
     conversation_id: str = "default",
@@ -182,86 +466,99 @@ async def run_agent(
     Returns:
         AgentResponse with message and optional widget
     """
-    mcp_server = await create_mcp_server()
-    agent = create_agent(mcp_server)
-
-    async with mcp_server:
-        # Run the agent
-        result = await Runner.run(agent, prompt)
-
-        # Extract the final output
-        final_message = result.final_output or ""
-
-        # Extract widget data from tool calls
-        widget_result = None
-        last_tool_name = None
-
-        # Process all items to find tool calls and their outputs
-        for item in result.new_items:
-            # Check for MCP tool call items
-            item_type = type(item).__name__
-
-            # Handle different item types
-            # ToolCallItem - captures the tool name
-            if item_type == 'ToolCallItem' and hasattr(item, 'raw_item'):
-                raw = item.raw_item
-                if hasattr(raw, 'name'):
-                    last_tool_name = raw.name
-
-            # ToolCallOutputItem - captures the tool output
-            elif item_type == 'ToolCallOutputItem':
-                tool_name = last_tool_name or ''
-                html = get_widget_html(tool_name) if tool_name else ''
-
-                if html:
-                    # Extract output from the item
-                    tool_output = {}
-
-                    # The output might be in different places depending on SDK version
-                    if hasattr(item, 'output'):
-                        output = item.output
-                    elif hasattr(item, 'raw_item'):
-                        raw = item.raw_item
-                        if isinstance(raw, dict):
-                            output = raw.get('output', raw)
-                        else:
-                            output = getattr(raw, 'output', None)
+    from agents import Runner
+    from agents.items import ToolCallItem, ToolCallOutputItem
+
+    async with mcp_session() as session:
+        result = await Runner.run(session.agent, prompt)
+
+    # Extract the final output
+    final_message = result.final_output or ""
+
+    # Extract widget data from tool calls
+    widget_result = None
+    last_tool_name = None
+    # With parallel tool calls, several calls precede their outputs, so
+    # outputs are matched to their call by call_id rather than by order.
+    tool_names_by_call_id: Dict[str, str] = {}
+
+    # Process all items to find tool calls and their outputs
+    for item in result.new_items:
+        # ToolCallItem - captures the tool name
+        if isinstance(item, ToolCallItem):
+            raw = item.raw_item
+            if hasattr(raw, 'name'):
+                last_tool_name = raw.name
+                call_id = getattr(raw, 'call_id', None)
+                if call_id:
+                    tool_names_by_call_id[call_id] = raw.name
+
+        # ToolCallOutputItem - captures the tool output
+        elif isinstance(item, ToolCallOutputItem):
+            raw = getattr(item, 'raw_item', None)
+            call_id = raw.get('call_id') if isinstance(raw, dict) else getattr(raw, 'call_id', None)
+            tool_name = tool_names_by_call_id.get(call_id) or last_tool_name or ''
+            html = get_widget_html(tool_name) if tool_name else ''
+
+            if html:
+                # Extract output from the item
+                # (it might be in different places depending on SDK version)
+                if hasattr(item, 'output'):
+                    output = item.output
+                elif hasattr(item, 'raw_item'):
+                    raw = item.raw_item
+                    if isinstance(raw, dict):
+                        output = raw.get('output', raw)
                     else:
-                        output = None
-
-                    # Parse the output
-                    if output:
-                        if isinstance(output, str):
-                            try:
-                                parsed = json.loads(output)
-                                if isinstance(parsed, dict):
-                                    if 'structuredContent' in parsed:
-                                        tool_output = parsed['structuredContent']
-                                    else:
-                                        tool_output = parsed
-                            except (json.JSONDecodeError, TypeError):
-                                pass
-                        elif isinstance(output, dict):
-                            if 'structuredContent' in output:
-                                tool_output = output['structuredContent']
-                            else:
-                                tool_output = output
-
-                    widget_result = WidgetResult(
-                        tool_name=tool_name,
-                        html=html,
-                        tool_output=tool_output,
-                        text_summary=f"Displaying {tool_name}"
-                    )
-
-        # Update conversation history
-        conversation_manager.add_message(conversation_id, "user", prompt)
-        conversation_manager.add_message(conversation_id, "assistant", final_message)
-
-        return AgentResponse(
-            message=final_message,
-            widget=widget_result
-        )
+                        output = getattr(raw, 'output', None)
+                else:
+                    output = None
+
+                tool_output = parse_tool_output(output)
+
+                widget_result = WidgetResult(
+                    tool_name=tool_name,
+                    html=html,
+                    tool_output=tool_output,
+                    text_summary=f"Displaying {tool_name}"
+                )
+
+    # Update conversation history
+    conversation_manager.add_message(conversation_id, "user", prompt)
+    conversation_manager.add_message(conversation_id, "assistant", final_message)
+
+    return AgentResponse(
+        message=final_message,
+        widget=widget_result
+    )
+
+
+async def run_agent_batch(
+    prompts: List[Tuple[str, str]],
+    concurrency: int = 16,
+) -> List[AgentResponse]:
+    """
+    Run several prompts concurrently.
+
+    Args:
+        prompts: (prompt, conversation_id) pairs
+        concurrency: Maximum number of prompts in flight at once
+
+    Returns:
+        AgentResponses in the same order as prompts
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(prompt: str, conversation_id: str) -> AgentResponse:
+        async with semaphore:
+            return await run_agent(prompt, conversation_id)
+
+    async with asyncio.TaskGroup() as group:
+        tasks = [
+            group.create_task(run_one(prompt, conversation_id))
+            for prompt, conversation_id in prompts
+        ]
+    return [task.result() for task in tasks]
 
 
 def clear_conversation(conversation_id: str = "default"):
@@ -7,18 +7,26 @@ registers itself at import time. Run with: uvicorn main:app --host 0.0.0.0 --por
 
 from __future__ import annotations
 
+import hashlib
 import os
+import sys
 import threading
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
 
 import mcp.types as types
+import orjson
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
 from pydantic import BaseModel, ConfigDict
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
 
 # Load .env file at startup (for BASE_URL and other config)
 _env_path = Path(__file__).parent / ".env"
@@ -95,51 +103,59 @@ mcp = FastMCP(
 # TOOL REGISTRATION
 # =============================================================================
 
-@mcp._mcp_server.list_tools()
-async def list_tools() -> List[types.Tool]:
-    tools = []
+# Every tool is a read-only view over local sample data. A single model
+# instance is shared by all tools; pydantic keeps it as-is instead of
+# validating a fresh copy per tool.
+READ_ONLY_TOOL_ANNOTATIONS = types.ToolAnnotations(
+    destructiveHint=False,
+    openWorldHint=False,
+    readOnlyHint=True,
+)
 
-    for widget in WIDGETS:
-        input_model = WIDGET_INPUT_MODELS.get(widget.identifier)
-        schema = get_tool_schema(input_model)
+# Tool and resource listings only change with BASE_URL (via the CSP metadata),
+# so each is built once per base URL and copied out per request.
 
-        tools.append(types.Tool(
+@lru_cache(maxsize=8)
+def _build_tools_list(base_url: str) -> List[types.Tool]:
+    tools = [
+        types.Tool(
             name=widget.identifier,
             title=widget.title,
             description=widget.description,
-            inputSchema=schema,
+            inputSchema=get_tool_schema(WIDGET_INPUT_MODELS.get(widget.identifier)),
             _meta=get_tool_meta(widget),
-            annotations={
-                "destructiveHint": False,
-                "openWorldHint": False,
-                "readOnlyHint": True,
-            },
-        ))
+            annotations=READ_ONLY_TOOL_ANNOTATIONS,
+        )
+        for widget in WIDGETS
+    ]
 
     # Data-only tools: called by widgets via callTool, not intended for LLM use.
     # They must be registered so MCP hosts can route callTool invocations.
-    for tool_def in DATA_ONLY_TOOL_DEFS:
-        tools.append(types.Tool(
+    tools.extend(
+        types.Tool(
             name=tool_def["name"],
             title=tool_def["title"],
             description=tool_def["description"],
             inputSchema=tool_def["inputSchema"],
-            annotations={
-                "destructiveHint": False,
-                "openWorldHint": False,
-                "readOnlyHint": True,
-            },
-        ))
+            annotations=READ_ONLY_TOOL_ANNOTATIONS,
+        )
+        for tool_def in DATA_ONLY_TOOL_DEFS
+    )
 
     return tools
 
 
+@mcp._mcp_server.list_tools()
+async def list_tools() -> List[types.Tool]:
+    return list(_build_tools_list(get_base_url()))
+
+
 # =============================================================================
 # RESOURCE REGISTRATION
 # =============================================================================
 
-@mcp._mcp_server.list_resources()
-async def list_resources() -> List[types.Resource]:
+@lru_cache(maxsize=8)
+def _build_resources_list(base_url: str) -> List[types.Resource]:
     return [
         types.Resource(
             name=widget.title,
@@ -153,8 +169,13 @@ async def list_resources() -> List[types.Resource]:
     ]
 
 
-@mcp._mcp_server.list_resource_templates()
-async def list_resource_templates() -> List[types.ResourceTemplate]:
+@mcp._mcp_server.list_resources()
+async def list_resources() -> List[types.Resource]:
+    return list(_build_resources_list(get_base_url()))
+
+
+@lru_cache(maxsize=8)
+def _build_resource_templates_list(base_url: str) -> List[types.ResourceTemplate]:
     return [
         types.ResourceTemplate(
             name=widget.title,
@@ -168,6 +189,11 @@ async def list_resource_templates() -> List[types.ResourceTemplate]:
     ]
 
 
+@mcp._mcp_server.list_resource_templates()
+async def list_resource_templates() -> List[types.ResourceTemplate]:
+    return list(_build_resource_templates_list(get_base_url()))
+
+
 # =============================================================================
 # REQUEST HANDLERS
 # =============================================================================
@@ -177,15 +203,19 @@ async def handle_read_resource(req: types.ReadResourceRequest) -> types.ServerRe
     if widget is None:
         return types.ServerResult(types.ReadResourceResult(contents=[], _meta={"error": f"Unknown resource: {req.params.uri}"}))
 
+    # Called inline: a warm cache hit is one stat(), far cheaper than a thread hop
+    html = load_widget_html(widget.component_name)
     return types.ServerResult(types.ReadResourceResult(contents=[
-        types.TextResourceContents(uri=widget.template_uri, mimeType=MIME_TYPE, text=load_widget_html(widget.component_name), _meta=get_tool_meta(widget))
+        types.TextResourceContents(uri=widget.template_uri, mimeType=MIME_TYPE, text=html, _meta=get_tool_meta(widget))
     ]))
 
 
 async def handle_call_tool(req: types.CallToolRequest) -> types.ServerResult:
-    tool_name = req.params.name
-    arguments = req.params.arguments or {}
+    return await call_tool(req.params.name, req.params.arguments or {})
+
 
+async def call_tool(tool_name: str, arguments: Dict[str, Any]) -> types.ServerResult:
+    """Dispatch a tool call by name (shared by MCP and the HTTP /tools/call)."""
     # Handle data-only tools (no widget UI)
     data_handler = DATA_ONLY_HANDLERS.get(tool_name)
     if data_handler:
@@ -199,14 +229,13 @@ async def handle_call_tool(req: types.CallToolRequest) -> types.ServerResult:
             isError=True,
         ))
 
-    handler = WIDGET_HANDLERS.get(tool_name)
-    if not handler:
+    if widget.handler is None:
         return types.ServerResult(types.CallToolResult(
             content=[types.TextContent(type="text", text=f"No handler for: {tool_name}")],
             isError=True,
         ))
 
-    return await handler(widget, arguments)
+    return await widget.handler(widget, arguments)
 
 
 # Register handlers
@@ -221,29 +250,44 @@ mcp._mcp_server.request_handlers[types.ReadResourceRequest] = handle_read_resour
 _inner_app = mcp.streamable_http_app()
 
 
-async def app(scope, receive, send):
-    """ASGI wrapper that starts the sandbox server on first request.
+def warm_widget_html_cache() -> None:
+    """Load every widget's HTML once so the first resource read doesn't pay for it.
+
+    Missing assets are reported but not fatal: the server still starts before
+    `pnpm run build` has been run, and reads will raise the usual error.
+    """
+    missing = []
+    for widget in WIDGETS:
+        try:
+            load_widget_html(widget.component_name)
+        except FileNotFoundError:
+            missing.append(widget.component_name)
+    if missing:
+        print(f"Widget HTML not built yet for: {', '.join(missing)} (run `pnpm run build`)")
+
+
+_mcp_lifespan = _inner_app.router.lifespan_context
+
+
+@asynccontextmanager
+async def _lifespan(starlette_app):
+    """Start the sandbox server alongside the MCP session manager.
 
     We can't start the sandbox server at module import time because that would
-    cause side effects when tests import this module. Instead, we start it
-    lazily on the first ASGI lifespan/request event.
+    cause side effects when tests import this module. Instead, it starts with
+    the ASGI lifespan, so the app is served directly with no per-request wrapper.
     """
-    if scope["type"] == "lifespan":
-        # Start sandbox server during ASGI lifespan startup
-        async def _wrapped_receive():
-            message = await receive()
-            if message["type"] == "lifespan.startup":
-                start_sandbox_server(8001)
-            return message
-        await _inner_app(scope, _wrapped_receive, send)
-    else:
-        await _inner_app(scope, receive, send)
-
-
-# Expose the inner app's attributes so middleware/routes can be added
-app.add_middleware = _inner_app.add_middleware  # type: ignore[attr-defined]
-app.mount = _inner_app.mount  # type: ignore[attr-defined]
-app.routes = _inner_app.routes  # type: ignore[attr-defined]
+    warm_widget_html_cache()
+    start_sandbox_server(8001)
+    async with _mcp_lifespan(starlette_app) as state:
+        yield state
+        if "agent_runner" in sys.modules:
+            # Close the simulator's shared MCP session and OpenAI client, if opened
+            await sys.modules["agent_runner"].shutdown()
+
+
+_inner_app.router.lifespan_context = _lifespan
+app = _inner_app
 
 try:
     from starlette.middleware.cors import CORSMiddleware
@@ -263,87 +307,94 @@ except Exception:
 # SIMULATOR CHAT API
 # =============================================================================
 
-from starlette.requests import Request
-from starlette.responses import JSONResponse
-from starlette.routing import Route
-import json as json_module
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (much faster on large widget payloads)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
 
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str
     conversation_id: Optional[str] = "default"
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", frozen=True)
 
 
-class WidgetData(BaseModel):
-    """Widget data returned from chat."""
-    tool_name: str
-    html: str
-    tool_output: Dict[str, Any]
-    model_config = ConfigDict(extra="forbid")
+@lru_cache(maxsize=64)
+def _encode_widget_html(html: str) -> bytes:
+    """JSON-encode widget HTML once per distinct document.
 
+    load_widget_html returns the same cached string object for an unchanged
+    widget, so repeat lookups hit on identity without rehashing the HTML.
+    """
+    return orjson.dumps(html)
 
-class ChatResponse(BaseModel):
-    """Response model for chat endpoint."""
-    message: str
-    widget: Optional[WidgetData] = None
-    conversation_id: str
-    model_config = ConfigDict(extra="forbid")
+
+def _encode_chat_response(message: str, widget: Any, conversation_id: str) -> bytes:
+    """Serialize a chat reply, splicing in the pre-encoded widget HTML.
+
+    Shape: {"message": str, "widget": {"tool_name", "html", "tool_output"} | null,
+    "conversation_id": str}
+    """
+    widget_json = b"null"
+    if widget:
+        widget_json = b"".join((
+            b'{"tool_name":', orjson.dumps(widget.tool_name),
+            b',"html":', _encode_widget_html(widget.html),
+            b',"tool_output":', orjson.dumps(widget.tool_output, option=orjson.OPT_NON_STR_KEYS),
+            b"}",
+        ))
+    return b"".join((
+        b'{"message":', orjson.dumps(message),
+        b',"widget":', widget_json,
+        b',"conversation_id":', orjson.dumps(conversation_id),
+        b"}",
+    ))
 
 
-async def chat_endpoint(request: Request) -> JSONResponse:
+async def chat_endpoint(request: Request) -> Response:
     """
     Chat endpoint for the local simulator.
     Receives a message, runs it through the OpenAI agent with MCP tools,
     and returns the response with any widget data.
     """
     try:
-        body = await request.json()
-        chat_request = ChatRequest.model_validate(body)
+        body = orjson.loads(await request.body())
+        chat_request = ChatRequest.__pydantic_validator__.validate_python(body)
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": f"Invalid request: {e}"},
             status_code=400
         )
 
     try:
-        # Import here to avoid circular imports
-        from agent_runner import run_agent, WidgetResult
+        # Imported on first use so the MCP server never depends on the
+        # simulator's config (a bad mcp_server_url only breaks the chat)
+        from agent_runner import run_agent
 
+        conversation_id = chat_request.conversation_id or "default"
         result = await run_agent(
             prompt=chat_request.message,
-            conversation_id=chat_request.conversation_id or "default"
+            conversation_id=conversation_id
         )
 
-        # Build response
-        widget_data = None
-        if result.widget:
-            widget_data = WidgetData(
-                tool_name=result.widget.tool_name,
-                html=result.widget.html,
-                tool_output=result.widget.tool_output
-            )
-
-        response = ChatResponse(
-            message=result.message,
-            widget=widget_data,
-            conversation_id=chat_request.conversation_id or "default"
+        return Response(
+            _encode_chat_response(result.message, result.widget, conversation_id),
+            media_type="application/json",
         )
 
-        return JSONResponse(response.model_dump())
-
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": str(e), "message": f"Error processing request: {e}"},
             status_code=500
         )
 
 
-async def reset_chat_endpoint(request: Request) -> JSONResponse:
+async def reset_chat_endpoint(request: Request) -> ORJSONResponse:
     """Reset conversation history."""
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
         conversation_id = body.get("conversation_id", "default")
     except Exception:
         conversation_id = "default"
@@ -351,39 +402,56 @@ async def reset_chat_endpoint(request: Request) -> JSONResponse:
     try:
         from agent_runner import clear_conversation
         clear_conversation(conversation_id)
-        return JSONResponse({"status": "ok", "conversation_id": conversation_id})
+        return ORJSONResponse({"status": "ok", "conversation_id": conversation_id})
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 
 # =============================================================================
 # SIMULATOR STATUS & TOOLS API (for Puter.js fallback)
 # =============================================================================
 
-async def chat_status_endpoint(request: Request) -> JSONResponse:
+# .env is loaded once at import; only the key's presence varies, so both
+# possible bodies are encoded up front.
+_CHAT_STATUS_BODIES: Dict[bool, bytes] = {
+    has_api_key: orjson.dumps({
+        "has_api_key": has_api_key,
+        "fallback_available": True,  # Puter.js is always available
+    })
+    for has_api_key in (True, False)
+}
+
+
+async def chat_status_endpoint(request: Request) -> Response:
     """
     Check if OpenAI API key is configured.
     Used by frontend to decide whether to use backend agent or Puter.js fallback.
     """
-    import os
-    from pathlib import Path
-    from dotenv import load_dotenv
+    has_api_key = bool(os.getenv("OPENAI_API_KEY"))
+    return Response(_CHAT_STATUS_BODIES[has_api_key], media_type="application/json")
 
-    # Load .env file
-    env_path = Path(__file__).parent / ".env"
-    if not env_path.exists():
-        env_path = Path(__file__).parent.parent / ".env"
-    load_dotenv(env_path)
 
-    has_api_key = bool(os.getenv("OPENAI_API_KEY"))
+@lru_cache(maxsize=1)
+def _tools_list_body() -> Tuple[bytes, str]:
+    """Encode the /tools payload once, with an ETag derived from its bytes.
 
-    return JSONResponse({
-        "has_api_key": has_api_key,
-        "fallback_available": True,  # Puter.js is always available
-    })
+    The payload only depends on the widget registry, which is fixed at import.
+    """
+    body = orjson.dumps({"tools": [
+        {
+            "type": "function",
+            "function": {
+                "name": widget.identifier,
+                "description": widget.description,
+                "parameters": get_tool_schema(WIDGET_INPUT_MODELS.get(widget.identifier)),
+            }
+        }
+        for widget in WIDGETS
+    ]})
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
 
 
-async def tools_list_endpoint(request: Request) -> JSONResponse:
+async def tools_list_endpoint(request: Request) -> Response:
     """
     Return tool definitions in OpenAI function calling format.
     Used by Puter.js fallback and the apptester to get available tools.
@@ -395,50 +463,45 @@ async def tools_list_endpoint(request: Request) -> JSONResponse:
     Helper tools are still callable via /tools/call and registered in
     the MCP list_tools() for MCP host routing.
     """
-    tools = []
+    body, etag = _tools_list_body()
+    headers = {"ETag": etag}
 
-    for widget in WIDGETS:
-        input_model = WIDGET_INPUT_MODELS.get(widget.identifier)
-        schema = get_tool_schema(input_model)
-        tools.append({
-            "type": "function",
-            "function": {
-                "name": widget.identifier,
-                "description": widget.description,
-                "parameters": schema,
-            }
-        })
+    if request is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
-    return JSONResponse({"tools": tools})
 
+# Constant error bodies are encoded once; errors that echo input stay dynamic
+_MISSING_TOOL_NAME_BODY = orjson.dumps({"error": "Missing tool name"})
 
-async def tool_call_endpoint(request: Request) -> JSONResponse:
+
+async def tool_call_endpoint(request: Request) -> Response:
     """
     Execute a tool and return the result.
     Used by Puter.js fallback to call MCP tools.
     Handles both widget tools (with HTML) and data-only tools (no HTML).
     """
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
         tool_name = body.get("name")
         arguments = body.get("arguments", {})
 
         if not tool_name:
-            return JSONResponse({"error": "Missing tool name"}, status_code=400)
-
-        # Create a mock request and call the handler
-        import mcp.types as types
-        mock_req = types.CallToolRequest(
-            method="tools/call",
-            params=types.CallToolRequestParams(name=tool_name, arguments=arguments)
-        )
+            return Response(_MISSING_TOOL_NAME_BODY, status_code=400, media_type="application/json")
 
-        result = await handle_call_tool(mock_req)
+        # Dispatch directly; there's no need to build a CallToolRequest.
+        # Only a missing/null value means "no arguments"; anything else that
+        # isn't an object is rejected, as CallToolRequestParams would.
+        if arguments is None:
+            arguments = {}
+        elif not isinstance(arguments, dict):
+            return ORJSONResponse({"error": "arguments must be a JSON object"}, status_code=400)
+        result = await call_tool(tool_name, arguments)
 
         # Check if the handler returned an error
         if hasattr(result, 'root') and getattr(result.root, 'isError', False):
             error_text = result.root.content[0].text if result.root.content else "Unknown error"
-            return JSONResponse({"error": error_text}, status_code=404)
+            return ORJSONResponse({"error": error_text}, status_code=404)
 
         # Extract structured content from result
         if hasattr(result, 'root') and hasattr(result.root, 'structuredContent'):
@@ -446,19 +509,22 @@ async def tool_call_endpoint(request: Request) -> JSONResponse:
         else:
             structured_content = {}
 
-        # Widget tools include HTML; data-only tools return just the output
+        # Widget tools include HTML; data-only tools return just the output.
+        # The HTML is spliced in pre-encoded rather than re-escaped per call.
+        response = [
+            b'{"tool_name":', orjson.dumps(tool_name),
+            b',"tool_output":', orjson.dumps(structured_content, option=orjson.OPT_NON_STR_KEYS),
+        ]
         widget = WIDGETS_BY_ID.get(tool_name)
-        response: Dict[str, Any] = {
-            "tool_name": tool_name,
-            "tool_output": structured_content,
-        }
         if widget:
-            response["html"] = load_widget_html(widget.component_name)
+            html = load_widget_html(widget.component_name)
+            response += (b',"html":', _encode_widget_html(html))
+        response.append(b"}")
 
-        return JSONResponse(response)
+        return Response(b"".join(response), media_type="application/json")
 
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 
 # Add chat routes to the app
@@ -473,6 +539,25 @@ app.routes.append(Route("/tools/call", tool_call_endpoint, methods=["POST"]))
 # SANDBOX PROXY SERVER (Port 8001)
 # =============================================================================
 
+@lru_cache(maxsize=256)
+def _build_sandbox_csp(resource_src: str, connect_src: str) -> str:
+    """Build the sandbox CSP header value.
+
+    Cached because every asset response carries the header and the domain
+    lists rarely vary between requests.
+    """
+    return (
+        f"default-src 'self'; "
+        f"script-src 'self' 'unsafe-inline' 'unsafe-eval' blob: {resource_src}; "
+        f"style-src 'self' 'unsafe-inline' {resource_src}; "
+        f"img-src 'self' data: blob: {resource_src}; "
+        f"font-src 'self' data: {resource_src}; "
+        f"connect-src 'self' {connect_src}; "
+        f"frame-src 'self' blob:; "
+        f"worker-src 'self' blob: {resource_src};"
+    )
+
+
 class SandboxProxyHandler(SimpleHTTPRequestHandler):
     """HTTP handler that serves sandbox proxy with CSP headers.
 
@@ -485,9 +570,8 @@ class SandboxProxyHandler(SimpleHTTPRequestHandler):
         super().__init__(*args, directory=str(ASSETS_DIR), **kwargs)
 
     def end_headers(self):
-        # Parse CSP from query params
-        parsed = urlparse(self.path)
-        query = parse_qs(parsed.query)
+        # Parse CSP from query params (plain asset requests have none)
+        query = parse_qs(urlparse(self.path).query) if "?" in self.path else {}
 
         # Build CSP directives
         resource_domains = query.get("resourceDomains", [])
@@ -504,18 +588,7 @@ class SandboxProxyHandler(SimpleHTTPRequestHandler):
         resource_src = " ".join(resource_domains) if resource_domains else "'self'"
         connect_src = " ".join(connect_domains) if connect_domains else "'self'"
 
-        csp = (
-            f"default-src 'self'; "
-            f"script-src 'self' 'unsafe-inline' 'unsafe-eval' blob: {resource_src}; "
-            f"style-src 'self' 'unsafe-inline' {resource_src}; "
-            f"img-src 'self' data: blob: {resource_src}; "
-            f"font-src 'self' data: {resource_src}; "
-            f"connect-src 'self' {connect_src}; "
-            f"frame-src 'self' blob:; "
-            f"worker-src 'self' blob: {resource_src};"
-        )
-
-        self.send_header("Content-Security-Policy", csp)
+        self.send_header("Content-Security-Policy", _build_sandbox_csp(resource_src, connect_src))
         self.send_header("Cache-Control", "no-cache, no-store, must-revalidate")
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
@@ -532,13 +605,15 @@ class SandboxProxyHandler(SimpleHTTPRequestHandler):
         print(f"[Sandbox:8001] {args[0]}")
 
 
-def start_sandbox_server(port: int = 8001) -> HTTPServer:
+def start_sandbox_server(port: int = 8001) -> ThreadingHTTPServer:
     """Start the sandbox proxy server on a separate port.
 
     This provides origin isolation for the MCP Apps sandbox.
     Raises OSError if the port is already in use.
     """
-    server = HTTPServer(("0.0.0.0", port), SandboxProxyHandler)
+    # One thread per connection, so parallel asset fetches from the iframe
+    # don't queue behind each other
+    server = ThreadingHTTPServer(("0.0.0.0", port), SandboxProxyHandler)
     thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
     print(f"Sandbox proxy server listening on http://0.0.0.0:{port}")
@@ -27,3 +27,18 @@ def mock_load_widget_html(mock_widget_html):
     """Patch load_widget_html to return mock HTML."""
     with patch("main.load_widget_html", return_value=mock_widget_html):
         yield mock_widget_html
+
+
+@pytest.fixture
+def assets_dir(tmp_path):
+    """Point widget HTML loading at an empty temporary assets directory.
+
+    The HTML caches are cleared on both sides so resolved paths never leak
+    between the temporary directory and the real one.
+    """
+    from widgets._base import _clear_html_cache
+
+    _clear_html_cache()
+    with patch("widgets._base.ASSETS_DIR", tmp_path):
+        yield tmp_path
+    _clear_html_cache()
@@ -0,0 +1,381 @@
+"""
+Tests for the agent runner.
+
+These tests verify that:
+1. The shared MCP session is reused across runs
+2. Only MCP transport errors retire the session
+3. A retired session is closed once its last run finishes
+4. Conversations are evicted least-recently-used first and expire when idle
+5. Each conversation keeps only its last MAX_CONVERSATION_HISTORY messages
+6. Tool outputs are parsed into widget data
+7. Tool outputs are paired with their calls by call_id
+8. Batched prompts respect the concurrency limit and keep their order
+9. The MCP transport only asks for HTTP/2 when it can be used
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import agent_runner
+from agents import Agent, Runner
+from agents.exceptions import UserError
+from agents.items import ToolCallItem, ToolCallOutputItem
+from openai.types.responses import ResponseFunctionToolCall
+
+
+class FakeMcpServer:
+    """Stands in for MCPServerStreamableHttp without opening a connection."""
+
+    def __init__(self):
+        self.cleanups = 0
+
+    async def connect(self):
+        pass
+
+    async def cleanup(self):
+        self.cleanups += 1
+
+    def invalidate_tools_cache(self):
+        pass
+
+
+@pytest.fixture
+def fake_mcp(monkeypatch):
+    """Replace the MCP connection and agent factories with fakes."""
+    async def create_mcp_server():
+        return FakeMcpServer()
+
+    monkeypatch.setattr(agent_runner, "create_mcp_server", create_mcp_server)
+    monkeypatch.setattr(agent_runner, "create_agent", lambda server: object())
+    monkeypatch.setattr(agent_runner, "_session", None)
+    monkeypatch.setattr(agent_runner, "_session_lock", asyncio.Lock())
+
+
+def transport_error() -> UserError:
+    """A transport failure as the Agents SDK surfaces it."""
+    error = UserError("Failed to call tool: Connection lost.")
+    error.__cause__ = httpx.ConnectError("connection refused")
+    return error
+
+
+class TestMcpSession:
+    """Tests for the shared MCP session."""
+
+    @pytest.mark.asyncio
+    async def test_session_is_reused(self, fake_mcp):
+        """Consecutive runs share one connection and agent."""
+        async with agent_runner.mcp_session() as first:
+            pass
+        async with agent_runner.mcp_session() as second:
+            pass
+        assert first is second
+        assert first.users == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_agent_creation_closes_connection(self, monkeypatch, fake_mcp):
+        """A connection opened for a session that can't be built is cleaned up."""
+        servers = []
+
+        async def create_mcp_server():
+            servers.append(FakeMcpServer())
+            return servers[-1]
+
+        def create_agent(server):
+            raise RuntimeError("Missing credentials")
+
+        monkeypatch.setattr(agent_runner, "create_mcp_server", create_mcp_server)
+        monkeypatch.setattr(agent_runner, "create_agent", create_agent)
+        with pytest.raises(RuntimeError):
+            async with agent_runner.mcp_session():
+                pass
+        assert servers[0].cleanups == 1
+        assert agent_runner._session is None
+
+    @pytest.mark.asyncio
+    async def test_other_errors_keep_session(self, fake_mcp):
+        """Model or tool errors leave the shared session connected."""
+        with pytest.raises(RuntimeError):
+            async with agent_runner.mcp_session() as session:
+                raise RuntimeError("429 Too Many Requests")
+        assert agent_runner._session is session
+        assert session.server.cleanups == 0
+
+    @pytest.mark.asyncio
+    async def test_transport_error_reconnects_lazily(self, fake_mcp):
+        """A transport error detaches the session; the next run reconnects."""
+        with pytest.raises(UserError):
+            async with agent_runner.mcp_session() as broken:
+                raise transport_error()
+        assert agent_runner._session is None
+        assert broken.server.cleanups == 1
+
+        async with agent_runner.mcp_session() as session:
+            assert session is not broken
+
+    @pytest.mark.asyncio
+    async def test_retired_session_outlives_active_runs(self, fake_mcp):
+        """Runs still using a broken session are not cancelled by its cleanup."""
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def long_run():
+            async with agent_runner.mcp_session() as session:
+                started.set()
+                await finish.wait()
+                return session
+
+        task = asyncio.create_task(long_run())
+        await started.wait()
+        with pytest.raises(UserError):
+            async with agent_runner.mcp_session() as broken:
+                raise transport_error()
+        assert broken.server.cleanups == 0
+
+        finish.set()
+        assert await task is broken
+        assert broken.server.cleanups == 1
+
+
+class TestIsMcpTransportError:
+    """Tests for is_mcp_transport_error."""
+
+    def test_wrapped_transport_error(self):
+        assert agent_runner.is_mcp_transport_error(transport_error())
+
+    def test_transport_error_in_group(self):
+        group = ExceptionGroup("run failed", [ValueError(), httpx.ReadError("reset")])
+        assert agent_runner.is_mcp_transport_error(group)
+
+    def test_other_errors(self):
+        assert not agent_runner.is_mcp_transport_error(RuntimeError("rate limited"))
+        assert not agent_runner.is_mcp_transport_error(UserError("bad tool arguments"))
+
+
+class FakeClock:
+    """A time.monotonic replacement that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive ConversationManager's idle TTL from a fake clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(agent_runner, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+class TestConversationStore:
+    """Tests for ConversationManager's LRU and TTL bounds."""
+
+    def test_evicts_least_recently_used(self, monkeypatch, clock):
+        """Past MAX_CONVERSATIONS, the conversation used longest ago goes first."""
+        monkeypatch.setattr(agent_runner, "MAX_CONVERSATIONS", 2)
+        manager = agent_runner.ConversationManager()
+        manager.add_message("a", "user", "first")
+        manager.add_message("b", "user", "second")
+        manager.get_history("a")  # "a" is now more recent than "b"
+        manager.add_message("c", "user", "third")
+        assert list(manager.conversations) == ["a", "c"]
+
+    def test_expires_idle_conversations(self, monkeypatch, clock):
+        """Conversations idle longer than the TTL are dropped on the next access."""
+        monkeypatch.setattr(agent_runner, "CONVERSATION_TTL_SECONDS", 60)
+        manager = agent_runner.ConversationManager()
+        manager.add_message("idle", "user", "hello")
+        clock.now += 30
+        manager.add_message("active", "user", "hello")
+        clock.now += 31
+        manager.get_history("active")
+        assert list(manager.conversations) == ["active"]
+        assert manager.get_history("idle") == []
+
+    def test_access_refreshes_ttl(self, monkeypatch, clock):
+        """Reading a conversation keeps it alive."""
+        monkeypatch.setattr(agent_runner, "CONVERSATION_TTL_SECONDS", 60)
+        manager = agent_runner.ConversationManager()
+        manager.add_message("chat", "user", "hello")
+        clock.now += 50
+        manager.get_history("chat")
+        clock.now += 50
+        assert manager.get_history("chat") == [{"role": "user", "content": "hello"}]
+
+    def test_clear(self, clock):
+        manager = agent_runner.ConversationManager()
+        manager.add_message("chat", "user", "hello")
+        manager.clear("chat")
+        manager.clear("unknown")
+        assert "chat" not in manager.conversations
+
+
+class TestConversationHistory:
+    """Tests for the per-conversation message limit."""
+
+    def test_keeps_messages_in_order(self, clock):
+        manager = agent_runner.ConversationManager()
+        manager.add_message("chat", "user", "hi")
+        manager.add_message("chat", "assistant", "hello")
+        assert manager.get_history("chat") == [
+            {"role": "user", "content": "hi"},
+            {"role": "assistant", "content": "hello"},
+        ]
+
+    def test_drops_oldest_past_limit(self, monkeypatch, clock):
+        """Only the newest MAX_CONVERSATION_HISTORY messages are kept."""
+        monkeypatch.setattr(agent_runner, "MAX_CONVERSATION_HISTORY", 3)
+        manager = agent_runner.ConversationManager()
+        for i in range(5):
+            manager.add_message("chat", "user", f"message {i}")
+        history = manager.get_history("chat")
+        assert [entry["content"] for entry in history] == ["message 2", "message 3", "message 4"]
+
+    def test_history_is_a_copy(self, clock):
+        """Mutating the returned list doesn't change the stored history."""
+        manager = agent_runner.ConversationManager()
+        manager.add_message("chat", "user", "hi")
+        manager.get_history("chat").clear()
+        assert len(manager.get_history("chat")) == 1
+
+
+class TestParseToolOutput:
+    """Tests for parse_tool_output."""
+
+    def test_prefers_structured_content(self):
+        output = '{"structuredContent": {"title": "Hi"}, "content": []}'
+        assert agent_runner.parse_tool_output(output) == {"title": "Hi"}
+
+    def test_whole_object_without_structured_content(self):
+        assert agent_runner.parse_tool_output({"title": "Hi"}) == {"title": "Hi"}
+
+    def test_plain_text_and_invalid_json(self):
+        assert agent_runner.parse_tool_output("Displayed the card") == {}
+        assert agent_runner.parse_tool_output("{not json") == {}
+
+    def test_non_object_outputs(self):
+        assert agent_runner.parse_tool_output(None) == {}
+        assert agent_runner.parse_tool_output(["a"]) == {}
+
+
+def tool_call(agent: Agent, name: str, call_id: str) -> ToolCallItem:
+    raw = ResponseFunctionToolCall(type="function_call", name=name, call_id=call_id, arguments="{}")
+    return ToolCallItem(agent=agent, raw_item=raw)
+
+
+def tool_output(agent: Agent, call_id: str, data: dict) -> ToolCallOutputItem:
+    raw = {"type": "function_call_output", "call_id": call_id, "output": ""}
+    return ToolCallOutputItem(agent=agent, raw_item=raw, output={"structuredContent": data})
+
+
+@pytest.fixture
+def fake_run(monkeypatch, fake_mcp):
+    """Make Runner.run return canned items instead of calling the model."""
+    agent = Agent(name="Widget Assistant")
+    result = SimpleNamespace(final_output="Here you go", new_items=[])
+
+    async def run(starting_agent, prompt):
+        return result
+
+    monkeypatch.setattr(Runner, "run", run)
+    monkeypatch.setattr(agent_runner, "get_widget_html", lambda name: f"<html>{name}</html>")
+    monkeypatch.setattr(agent_runner, "conversation_manager", agent_runner.ConversationManager())
+    return SimpleNamespace(agent=agent, result=result)
+
+
+class TestRunAgent:
+    """Tests for run_agent's handling of the run items."""
+
+    @pytest.mark.asyncio
+    async def test_outputs_paired_by_call_id(self, fake_run):
+        """With parallel calls, each output is matched to its own call."""
+        agent = fake_run.agent
+        fake_run.result.new_items = [
+            tool_call(agent, "show_card", "call_1"),
+            tool_call(agent, "show_list", "call_2"),
+            tool_output(agent, "call_2", {"items": []}),
+            tool_output(agent, "call_1", {"title": "Card"}),
+        ]
+        response = await agent_runner.run_agent("show me a card")
+        assert response.message == "Here you go"
+        assert response.widget.tool_name == "show_card"
+        assert response.widget.html == "<html>show_card</html>"
+        assert response.widget.tool_output == {"title": "Card"}
+
+    @pytest.mark.asyncio
+    async def test_no_tool_calls(self, fake_run):
+        response = await agent_runner.run_agent("hello")
+        assert response.widget is None
+
+    @pytest.mark.asyncio
+    async def test_records_the_turn(self, fake_run):
+        await agent_runner.run_agent("hello", conversation_id="chat")
+        assert agent_runner.conversation_manager.get_history("chat") == [
+            {"role": "user", "content": "hello"},
+            {"role": "assistant", "content": "Here you go"},
+        ]
+
+
+class TestRunAgentBatch:
+    """Tests for run_agent_batch."""
+
+    @pytest.mark.asyncio
+    async def test_order_and_concurrency(self, monkeypatch):
+        """Responses come back in prompt order with at most `concurrency` in flight."""
+        in_flight = 0
+        peak = 0
+
+        async def run_agent(prompt, conversation_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # Later prompts finish first
+            await asyncio.sleep(0.01 / (int(prompt) + 1))
+            in_flight -= 1
+            return agent_runner.AgentResponse(message=f"{prompt}:{conversation_id}")
+
+        monkeypatch.setattr(agent_runner, "run_agent", run_agent)
+        prompts = [(str(i), f"chat-{i}") for i in range(6)]
+        responses = await agent_runner.run_agent_batch(prompts, concurrency=2)
+        assert [r.message for r in responses] == [f"{i}:chat-{i}" for i in range(6)]
+        assert peak == 2
+
+
+class TestMcpHttpClient:
+    """Tests for create_mcp_http_client."""
+
+    @pytest.fixture
+    def client_kwargs(self, monkeypatch):
+        """Capture the arguments the transport client is built with."""
+        captured = {}
+        monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: captured.update(kwargs))
+        return captured
+
+    def test_https_with_h2_uses_http2(self, monkeypatch, client_kwargs):
+        monkeypatch.setattr(agent_runner, "HTTP2_AVAILABLE", True)
+        monkeypatch.setattr(agent_runner, "MCP_SERVER_URL", "https://example.com/mcp")
+        agent_runner.create_mcp_http_client()
+        assert client_kwargs["http2"] is True
+
+    def test_plain_http_keeps_http1(self, monkeypatch, client_kwargs):
+        monkeypatch.setattr(agent_runner, "HTTP2_AVAILABLE", True)
+        monkeypatch.setattr(agent_runner, "MCP_SERVER_URL", "http://localhost:8000/mcp")
+        agent_runner.create_mcp_http_client()
+        assert client_kwargs["http2"] is False
+
+    def test_no_http2_without_h2(self, monkeypatch, client_kwargs):
+        """Without h2 installed, httpx would raise ImportError on http2=True."""
+        monkeypatch.setattr(agent_runner, "HTTP2_AVAILABLE", False)
+        monkeypatch.setattr(agent_runner, "MCP_SERVER_URL", "https://example.com/mcp")
+        agent_runner.create_mcp_http_client()
+        assert client_kwargs["http2"] is False
+
+    def test_only_given_arguments_are_forwarded(self, client_kwargs):
+        agent_runner.create_mcp_http_client(headers={"X-Test": "1"})
+        assert client_kwargs["headers"] == {"X-Test": "1"}
+        assert "timeout" not in client_kwargs and "auth" not in client_kwargs
@@ -109,6 +109,57 @@ class TestInputModelValidation:
         )
 
 
+class TestParseInput:
+    """Tests for the parse_input helper used by widget handlers."""
+
+    @pytest.mark.parametrize("name,model", INPUT_MODELS)
+    def test_empty_arguments_reuse_default_instance(self, name, model):
+        """Empty arguments return one shared default instance per model."""
+        from widgets._base import parse_input
+
+        first = parse_input(model, {})
+        assert first is parse_input(model, {})
+        assert first.model_dump() == model().model_dump()
+
+    @pytest.mark.parametrize("name,model", INPUT_MODELS)
+    def test_shared_default_is_immutable(self, name, model):
+        """Input models are frozen, so a handler can't change the shared default."""
+        from widgets._base import parse_input
+
+        payload = parse_input(model, {})
+        for field in model.model_fields:
+            with pytest.raises(ValidationError):
+                setattr(payload, field, getattr(payload, field))
+
+    def test_mutable_model_gets_fresh_instance(self):
+        """Models that aren't frozen are not shared between calls."""
+        from pydantic import BaseModel
+        from widgets._base import parse_input
+
+        class MutableInput(BaseModel):
+            title: str = "Default"
+
+        first = parse_input(MutableInput, {})
+        first.title = "Changed"
+        assert parse_input(MutableInput, {}).title == "Default"
+
+    @pytest.mark.parametrize("name,model", INPUT_MODELS)
+    def test_empty_list_is_rejected(self, name, model):
+        """Falsy non-dict arguments still go through validation."""
+        from widgets._base import parse_input
+
+        with pytest.raises(ValidationError):
+            parse_input(model, [])
+
+    @pytest.mark.parametrize("name,model", INPUT_MODELS)
+    def test_non_empty_arguments_are_validated(self, name, model):
+        """Non-empty arguments still go through full validation."""
+        from widgets._base import parse_input
+
+        with pytest.raises(ValidationError):
+            parse_input(model, {"completely_unknown_field_that_should_not_exist": "value"})
+
+
 class TestInputModelConsistency:
     """Tests for consistency across input models."""
 
@@ -6,6 +6,7 @@ These tests verify that the MCP protocol INFRASTRUCTURE works correctly:
 2. list_resources returns properly formatted Resource objects
 3. handle_call_tool routes requests correctly
 4. Error handling works for unknown tools/resources
+5. The HTTP /tools/call and /chat endpoints return well-formed JSON bodies
 
 Developers can add/remove widgets without modifying these tests,
 as long as they follow the established patterns.
@@ -128,6 +129,26 @@ class TestToolsHttpEndpoint:
             f"Helper tools should not be in the HTTP /tools response."
         )
 
+    @pytest.mark.asyncio
+    async def test_http_tools_honours_etag(self):
+        """HTTP /tools returns 304 when the client already has the payload."""
+        from main import tools_list_endpoint
+        from starlette.requests import Request
+
+        response = await tools_list_endpoint(None)
+        etag = response.headers["etag"]
+
+        request = Request({
+            "type": "http",
+            "method": "GET",
+            "headers": [(b"if-none-match", etag.encode())],
+        })
+        cached = await tools_list_endpoint(request)
+
+        assert cached.status_code == 304
+        assert cached.body == b""
+        assert cached.headers["etag"] == etag
+
     @pytest.mark.asyncio
     async def test_helper_tools_are_callable_via_handle_call_tool(self):
         """Helper tools (not in WIDGETS) must still be callable via handle_call_tool."""
@@ -148,6 +169,155 @@ class TestToolsHttpEndpoint:
             )
 
 
+class TestToolCallHttpEndpoint:
+    """Tests for the HTTP /tools/call endpoint used by the Puter.js fallback.
+
+    The response body is assembled from pre-encoded JSON fragments, so these
+    tests parse it back and check every key.
+    """
+
+    # Quotes, backslashes, newlines and non-ASCII all need escaping
+    WIDGET_HTML = '<html><script>var s = "a\\b";\n</script><p>caf\u00e9 \u2014 </p></html>'
+
+    @pytest.fixture
+    def client(self):
+        from starlette.testclient import TestClient
+        from main import app
+
+        return TestClient(app)
+
+    def test_widget_tool_includes_html(self, client):
+        """Widget tools return tool_name, tool_output and the widget HTML."""
+        import json
+        from unittest.mock import patch
+
+        with patch("main.load_widget_html", return_value=self.WIDGET_HTML):
+            response = client.post("/tools/call", json={"name": "show_card", "arguments": {"title": "Hi"}})
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        assert set(data) == {"tool_name", "tool_output", "html"}
+        assert data["tool_name"] == "show_card"
+        assert data["tool_output"]["title"] == "Hi"
+        assert data["html"] == self.WIDGET_HTML
+
+    def test_data_only_tool_has_no_html(self, client):
+        """Data-only tools return just tool_name and tool_output."""
+        import json
+        from main import WIDGETS_BY_ID
+        from widgets import DATA_ONLY_HANDLERS
+
+        tool_name = next(name for name in DATA_ONLY_HANDLERS if name not in WIDGETS_BY_ID)
+        response = client.post("/tools/call", json={"name": tool_name})
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        assert set(data) == {"tool_name", "tool_output"}
+        assert data["tool_name"] == tool_name
+        assert isinstance(data["tool_output"], dict) and data["tool_output"]
+
+    def test_unknown_tool(self, client):
+        import json
+
+        response = client.post("/tools/call", json={"name": "no_such_tool"})
+
+        assert response.status_code == 404
+        assert json.loads(response.content) == {"error": "Unknown tool: no_such_tool"}
+
+    def test_non_object_arguments_rejected(self, client):
+        """Malformed arguments are rejected rather than treated as empty."""
+        import json
+
+        response = client.post("/tools/call", json={"name": "show_card", "arguments": []})
+
+        assert response.status_code == 400
+        assert json.loads(response.content) == {"error": "arguments must be a JSON object"}
+
+    def test_missing_name(self, client):
+        import json
+
+        response = client.post("/tools/call", json={"arguments": {}})
+
+        assert response.status_code == 400
+        assert json.loads(response.content) == {"error": "Missing tool name"}
+
+
+class TestChatHttpEndpoint:
+    """Tests for the simulator's /chat endpoint.
+
+    The agent is replaced by a canned reply; the body is hand-assembled
+    around the pre-encoded widget HTML, so it is parsed back and compared
+    with the ChatResponse shape (message, widget, conversation_id).
+    """
+
+    @pytest.fixture
+    def client(self):
+        from starlette.testclient import TestClient
+        from main import app
+
+        return TestClient(app)
+
+    @pytest.fixture
+    def agent_reply(self, monkeypatch):
+        """Make agent_runner.run_agent return the reply set by the test."""
+        import agent_runner
+
+        reply = {}
+
+        async def run_agent(prompt, conversation_id="default"):
+            reply["prompt"] = prompt
+            reply["conversation_id"] = conversation_id
+            return reply["response"]
+
+        monkeypatch.setattr(agent_runner, "run_agent", run_agent)
+        return reply
+
+    def test_reply_with_widget(self, client, agent_reply):
+        import json
+        from agent_runner import AgentResponse, WidgetResult
+
+        html = '<html><script>var s = "a\\b";\n</script><p>caf\u00e9</p></html>'
+        agent_reply["response"] = AgentResponse(
+            message="Here is your card",
+            widget=WidgetResult(
+                tool_name="show_card",
+                html=html,
+                tool_output={"title": "Hi", "items": [{"id": "1"}]},
+                text_summary="Displaying show_card",
+            ),
+        )
+
+        response = client.post("/chat", json={"message": "show a card", "conversation_id": "chat-1"})
+
+        assert response.status_code == 200
+        assert json.loads(response.content) == {
+            "message": "Here is your card",
+            "widget": {
+                "tool_name": "show_card",
+                "html": html,
+                "tool_output": {"title": "Hi", "items": [{"id": "1"}]},
+            },
+            "conversation_id": "chat-1",
+        }
+        assert agent_reply["prompt"] == "show a card"
+        assert agent_reply["conversation_id"] == "chat-1"
+
+    def test_reply_without_widget(self, client, agent_reply):
+        import json
+        from agent_runner import AgentResponse
+
+        agent_reply["response"] = AgentResponse(message='Just text, with "quotes"')
+
+        response = client.post("/chat", json={"message": "hello"})
+
+        assert response.status_code == 200
+        assert json.loads(response.content) == {
+            "message": 'Just text, with "quotes"',
+            "widget": None,
+            "conversation_id": "default",
+        }
+
+
 class TestListResources:
     """Tests for list_resources endpoint infrastructure."""
 
@@ -278,6 +448,15 @@ class TestHandleCallTool:
             assert result.root.isError is not True, f"Widget {widget.identifier} failed"
             assert result.root.structuredContent is not None, f"Widget {widget.identifier} missing structuredContent"
 
+    def test_registered_widgets_carry_their_handler(self):
+        """Registry widgets expose their module's handle() as widget.handler."""
+        from main import WIDGETS, WIDGET_HANDLERS
+
+        for widget in WIDGETS:
+            assert widget.handler is WIDGET_HANDLERS[widget.identifier], (
+                f"Widget {widget.identifier} has no handler attached"
+            )
+
 
 class TestHandleReadResource:
     """Tests for handle_read_resource infrastructure."""
@@ -21,92 +21,134 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 class TestLoadWidgetHtml:
     """Tests for load_widget_html function."""
 
-    def test_loads_exact_filename(self, tmp_path):
+    def test_loads_exact_filename(self, assets_dir):
         """load_widget_html finds exact filename match."""
         # Create a temporary HTML file
         html_content = "<html><body>Test Widget</body></html>"
-        html_file = tmp_path / "test-widget.html"
+        html_file = assets_dir / "test-widget.html"
         html_file.write_text(html_content)
 
-        # Import and patch ASSETS_DIR
         from main import load_widget_html
 
-        # Clear the LRU cache to ensure fresh state
-        load_widget_html.cache_clear()
+        result = load_widget_html("test-widget")
+        assert result == html_content
 
-        with patch("widgets._base.ASSETS_DIR", tmp_path):
-            result = load_widget_html("test-widget")
-            assert result == html_content
-
-    def test_fallback_to_hashed_filename(self, tmp_path):
+    def test_fallback_to_hashed_filename(self, assets_dir):
         """load_widget_html falls back to hashed filename when exact not found."""
         html_content = "<html><body>Hashed Widget</body></html>"
         # Create only the hashed version
-        hashed_file = tmp_path / "test-widget-abc123.html"
+        hashed_file = assets_dir / "test-widget-abc123.html"
         hashed_file.write_text(html_content)
 
         from main import load_widget_html
-        load_widget_html.cache_clear()
 
-        with patch("widgets._base.ASSETS_DIR", tmp_path):
-            result = load_widget_html("test-widget")
-            assert result == html_content
+        result = load_widget_html("test-widget")
+        assert result == html_content
 
-    def test_uses_latest_hashed_file(self, tmp_path):
+    def test_uses_latest_hashed_file(self, assets_dir):
         """load_widget_html uses latest hashed file when multiple exist."""
         old_content = "<html>Old</html>"
         new_content = "<html>New</html>"
 
         # Create multiple hashed versions (sorted alphabetically)
-        (tmp_path / "widget-aaa111.html").write_text(old_content)
-        (tmp_path / "widget-zzz999.html").write_text(new_content)
+        (assets_dir / "widget-aaa111.html").write_text(old_content)
+        (assets_dir / "widget-zzz999.html").write_text(new_content)
+
+        from main import load_widget_html
+
+        result = load_widget_html("widget")
+        # Should use the last one when sorted (zzz999)
+        assert result == new_content
+
+    def test_rewrites_relative_urls(self, assets_dir):
+        """load_widget_html points ./ src and href attributes at BASE_URL."""
+        (assets_dir / "urls.html").write_text(
+            '<script src="./app.js"></script><link href="./app.css"><p>./text</p>'
+        )
+
+        from main import load_widget_html
+
+        with patch.dict(os.environ, {"BASE_URL": "https://example.test/assets/"}):
+            result = load_widget_html("urls")
+
+        assert result == (
+            '<script src="https://example.test/assets/app.js"></script>'
+            '<link href="https://example.test/assets/app.css"><p>./text</p>'
+        )
+
+    def test_hashed_fallback_rescans_after_rebuild(self, assets_dir):
+        """load_widget_html reuses the fallback match until the file is replaced."""
+        old_file = assets_dir / "widget-aaa111.html"
+        old_file.write_text("<html>Old</html>")
+
+        from main import load_widget_html
+
+        assert load_widget_html("widget") == "<html>Old</html>"
+
+        # Simulate a rebuild: the old hashed file is replaced by a new one
+        old_file.unlink()
+        (assets_dir / "widget-bbb222.html").write_text("<html>New</html>")
+
+        assert load_widget_html("widget") == "<html>New</html>"
+
+    def test_exact_file_replaces_cached_fallback(self, assets_dir):
+        """An exact <name>.html built after a hashed fallback was cached wins."""
+        (assets_dir / "widget-aaa111.html").write_text("<html>Hashed</html>")
 
         from main import load_widget_html
-        load_widget_html.cache_clear()
 
-        with patch("widgets._base.ASSETS_DIR", tmp_path):
-            result = load_widget_html("widget")
-            # Should use the last one when sorted (zzz999)
-            assert result == new_content
+        assert load_widget_html("widget") == "<html>Hashed</html>"
+
+        (assets_dir / "widget.html").write_text("<html>Exact</html>")
+
+        assert load_widget_html("widget") == "<html>Exact</html>"
 
-    def test_raises_file_not_found(self, tmp_path):
+    def test_cache_hit_skips_path_resolution(self, assets_dir):
+        """load_widget_html only resolves the file path on the first load."""
+        (assets_dir / "resolved-widget.html").write_text("<html>Resolved</html>")
+
+        from main import load_widget_html
+        import widgets._base as base
+
+        with patch("widgets._base._resolve_html_path", wraps=base._resolve_html_path) as resolve:
+            load_widget_html("resolved-widget")
+            load_widget_html("resolved-widget")
+
+        assert resolve.call_count == 1
+
+    def test_raises_file_not_found(self, assets_dir):
         """load_widget_html raises FileNotFoundError for missing widget."""
         from main import load_widget_html
-        load_widget_html.cache_clear()
 
-        with patch("widgets._base.ASSETS_DIR", tmp_path):
-            with pytest.raises(FileNotFoundError) as exc_info:
-                load_widget_html("nonexistent-widget")
+        with pytest.raises(FileNotFoundError) as exc_info:
+            load_widget_html("nonexistent-widget")
 
-            assert "nonexistent-widget" in str(exc_info.value)
-            assert "pnpm run build" in str(exc_info.value)
+        assert "nonexistent-widget" in str(exc_info.value)
+        assert "pnpm run build" in str(exc_info.value)
 
-    def test_caching_works(self, tmp_path):
+    def test_caching_works(self, assets_dir):
         """load_widget_html caches by mtime and invalidates on change."""
         html_content = "<html>Cached</html>"
-        html_file = tmp_path / "cached-widget.html"
+        html_file = assets_dir / "cached-widget.html"
         html_file.write_text(html_content)
 
         from main import load_widget_html
-        load_widget_html.cache_clear()
 
-        with patch("widgets._base.ASSETS_DIR", tmp_path):
-            # First call
-            result1 = load_widget_html("cached-widget")
-            assert result1 == html_content
+        # First call
+        result1 = load_widget_html("cached-widget")
+        assert result1 == html_content
 
-            # Second call with same mtime returns cached value
-            result2 = load_widget_html("cached-widget")
-            assert result2 == html_content
+        # Second call with same mtime returns cached value
+        result2 = load_widget_html("cached-widget")
+        assert result2 == html_content
 
-            # Modify the file and bump mtime so cache invalidates
-            import os, time
-            html_file.write_text("<html>Modified</html>")
-            new_mtime = html_file.stat().st_mtime + 1
-            os.utime(html_file, (new_mtime, new_mtime))
+        # Modify the file and bump mtime so cache invalidates
+        html_file.write_text("<html>Modified</html>")
+        new_mtime = html_file.stat().st_mtime + 1
+        os.utime(html_file, (new_mtime, new_mtime))
 
-            result3 = load_widget_html("cached-widget")
-            assert result3 == "<html>Modified</html>"
+        result3 = load_widget_html("cached-widget")
+        assert result3 == "<html>Modified</html>"
 
 
 class TestWidgetConfiguration:
@@ -152,6 +194,53 @@ class TestWidgetConfiguration:
         assert widget.component_name == "my-widget"
 
 
+class TestLazyHtmlLoading:
+    """Widget HTML is only read when a resource is actually requested."""
+
+    @pytest.mark.asyncio
+    async def test_listing_does_not_load_html(self):
+        """list_tools/list_resources/list_resource_templates never read HTML."""
+        from main import list_tools, list_resources, list_resource_templates
+
+        with patch("main.load_widget_html", side_effect=AssertionError("HTML loaded")):
+            await list_tools()
+            await list_resources()
+            await list_resource_templates()
+
+    def test_widget_stores_component_name_not_html(self):
+        """Widgets reference their bundle by name instead of holding the HTML."""
+        from main import WIDGETS
+
+        for widget in WIDGETS:
+            assert widget.component_name
+            assert not hasattr(widget, "html")
+
+
+class TestWarmWidgetHtmlCache:
+    """Tests for the startup cache warm-up."""
+
+    def test_warms_every_widget(self, assets_dir):
+        """warm_widget_html_cache loads each widget's HTML once."""
+        from main import WIDGETS, load_widget_html, warm_widget_html_cache
+        from widgets._base import _render_widget_html
+
+        for widget in WIDGETS:
+            (assets_dir / f"{widget.component_name}.html").write_text("<html></html>")
+
+        warm_widget_html_cache()
+        assert _render_widget_html.cache_info().misses == len(WIDGETS)
+
+        # Warmed entries serve later loads without re-reading files
+        load_widget_html(WIDGETS[0].component_name)
+        assert _render_widget_html.cache_info().misses == len(WIDGETS)
+
+    def test_missing_assets_do_not_raise(self, assets_dir):
+        """Startup still succeeds before the widgets have been built."""
+        from main import warm_widget_html_cache
+
+        warm_widget_html_cache()
+
+
 class TestAssetsDirectory:
     """Tests for ASSETS_DIR configuration."""
 
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import dataclasses
 import importlib
 import pkgutil
 from typing import Any, Callable, Coroutine, Dict, List
@@ -20,7 +21,7 @@ for _, _name, _ in pkgutil.iter_modules(__path__):
         continue
     _mod = importlib.import_module(f".{_name}", __package__)
     if hasattr(_mod, "WIDGET"):
-        _w = _mod.WIDGET
+        _w = dataclasses.replace(_mod.WIDGET, handler=_mod.handle)
         WIDGETS.append(_w)
         WIDGETS_BY_ID[_w.identifier] = _w
         WIDGET_HANDLERS[_w.identifier] = _mod.handle
@@ -3,15 +3,20 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Coroutine, Dict, List, Optional, TypeVar
 from urllib.parse import urlparse
 
-from pydantic import ValidationError
+import mcp.types as types
+from pydantic import BaseModel, ValidationError
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Widget:
     """Configuration for a widget that can be rendered in MCP Apps hosts."""
     identifier: str
@@ -21,6 +26,10 @@ class Widget:
     invoking: str
     invoked: str
     component_name: str
+    # The module's handle(), attached by the registry so one lookup finds both
+    handler: Optional[Callable[..., Coroutine[Any, Any, Any]]] = field(
+        default=None, compare=False, repr=False,
+    )
 
 
 ASSETS_DIR = Path(__file__).resolve().parent.parent.parent / "assets"
@@ -30,15 +39,18 @@ MIME_TYPE = "text/html;profile=mcp-app"
 
 _DEFAULT_BASE_URL = "http://localhost:8000/assets"
 
-# Cache for loaded HTML with resolved URLs (keyed by component name)
-_html_cache: Dict[str, str] = {}
-_html_mtimes: Dict[str, float] = {}
+# Per-widget bound on memoized tool results (keyed by validated input)
+RESULT_CACHE_SIZE = 128
 
+# Resolved HTML file per component name (exact or hashed fallback)
+_html_paths: Dict[str, Path] = {}
 
-def _clear_html_cache() -> None:
-    """Clear the HTML cache. Used by tests."""
-    _html_cache.clear()
-    _html_mtimes.clear()
+# Relative asset references ("./...") in built widget HTML, matched on raw bytes
+_RELATIVE_URL_RE = re.compile(rb'(src|href)="\./')
+
+# Rendered HTML entries kept by _render_widget_html. A rebuild changes the
+# file's mtime (and so the cache key), leaving one stale entry behind.
+HTML_CACHE_SIZE = 64
 
 
 def get_base_url() -> str:
@@ -52,9 +64,18 @@ def _resolve_html_path(component_name: str) -> Path:
     if html_path.exists():
         return html_path
 
-    fallback_candidates = sorted(ASSETS_DIR.glob(f"{component_name}-*.html"))
-    if fallback_candidates:
-        return fallback_candidates[-1]
+    # One readdir pass with plain string matching instead of a glob
+    prefix = f"{component_name}-"
+    try:
+        with os.scandir(ASSETS_DIR) as entries:
+            fallback_names = [
+                entry.name for entry in entries
+                if entry.name.startswith(prefix) and entry.name.endswith(".html") and entry.is_file()
+            ]
+    except FileNotFoundError:
+        fallback_names = []
+    if fallback_names:
+        return ASSETS_DIR / max(fallback_names)
 
     raise FileNotFoundError(
         f'Widget HTML for "{component_name}" not found in {ASSETS_DIR}. '
@@ -62,6 +83,20 @@ def _resolve_html_path(component_name: str) -> Path:
     )
 
 
+@lru_cache(maxsize=HTML_CACHE_SIZE)
+def _render_widget_html(html_path: Path, mtime: float, base_url: str) -> str:
+    """Read a widget's HTML file and point its relative URLs at base_url.
+
+    mtime is only part of the cache key, so a rebuilt file is re-read.
+    """
+    # Convert relative paths to absolute URLs for srcdoc iframe compatibility
+    # HTML files use "./" prefix which works for static serving but not srcdoc.
+    # One regex pass over the raw bytes rewrites both src= and href=.
+    prefix = b'="' + base_url.encode("utf8") + b"/"
+    html = _RELATIVE_URL_RE.sub(lambda m: m.group(1) + prefix, html_path.read_bytes())
+    return html.decode("utf8")
+
+
 def load_widget_html(component_name: str) -> str:
     """Load the built widget HTML from the assets directory.
 
@@ -69,30 +104,33 @@ def load_widget_html(component_name: str) -> str:
     This is needed because widget HTML is injected into iframes via srcdoc,
     where relative paths don't resolve correctly.
 
-    Results are cached per component name. The cache is automatically
-    invalidated when the file's modification time changes, so rebuilding
-    widgets takes effect without restarting the server.
+    Results are cached by file, modification time and BASE_URL, so
+    rebuilding widgets takes effect without restarting the server.
     """
-    html_path = _resolve_html_path(component_name)
-    current_mtime = html_path.stat().st_mtime
-
-    if component_name in _html_cache and _html_mtimes.get(component_name) == current_mtime:
-        return _html_cache[component_name]
+    # Reuse the resolved path so a cache hit costs a single stat. A hashed
+    # fallback costs one more, so an exact <name>.html takes over once built.
+    html_path = _html_paths.get(component_name)
+    if html_path is None or (
+        html_path.stem != component_name
+        and (ASSETS_DIR / f"{component_name}.html").exists()
+    ):
+        html_path = _html_paths[component_name] = _resolve_html_path(component_name)
+    try:
+        mtime = html_path.stat().st_mtime
+    except FileNotFoundError:
+        # A rebuild replaced the file (e.g. a new hashed name); resolve again
+        html_path = _html_paths[component_name] = _resolve_html_path(component_name)
+        mtime = html_path.stat().st_mtime
+    return _render_widget_html(html_path, mtime, get_base_url())
 
-    html = html_path.read_text(encoding="utf8")
 
-    # Convert relative paths to absolute URLs for srcdoc iframe compatibility
-    # HTML files use "./" prefix which works for static serving but not srcdoc
-    base_url = get_base_url()
-    html = html.replace('src="./', f'src="{base_url}/')
-    html = html.replace('href="./', f'href="{base_url}/')
-
-    _html_cache[component_name] = html
-    _html_mtimes[component_name] = current_mtime
-    return html
+def _clear_html_cache() -> None:
+    """Clear the HTML cache. Used by tests."""
+    _render_widget_html.cache_clear()
+    _html_paths.clear()
 
 
-# Add cache_clear method for test compatibility (mimics lru_cache interface)
+# Expose cache_clear like an lru_cache-decorated function
 load_widget_html.cache_clear = _clear_html_cache  # type: ignore[attr-defined]
 
 
@@ -118,9 +156,14 @@ def get_csp_domains() -> Dict[str, List[str]]:
     """Return CSP domains based on the current BASE_URL.
 
     This allows the MCP App sandbox to load external assets (JS, CSS, images)
-    from our server and from external CDNs.
+    from our server and from external CDNs. The result is shared between
+    callers (it is embedded in every tool's metadata), so don't mutate it.
     """
-    base_url = get_base_url()
+    return _csp_domains_for(get_base_url())
+
+
+@lru_cache(maxsize=8)
+def _csp_domains_for(base_url: str) -> Dict[str, List[str]]:
     # Extract origin from base URL (e.g., "http://localhost:8000" from "http://localhost:8000/assets")
     parsed = urlparse(base_url)
     origin = f"{parsed.scheme}://{parsed.netloc}"
@@ -142,62 +185,103 @@ def get_tool_meta(widget: Widget) -> Dict[str, Any]:
     The `csp` field specifies Content Security Policy domains for the sandbox.
     This follows the MCP Apps protocol specification.
     """
-    return {
-        "ui": {
-            "resourceUri": widget.template_uri,
-            "csp": get_csp_domains(),
-        },
-    }
+    return _ui_meta(widget, get_base_url())
+
 
+# Tool invocation results carry the same metadata as the tool listing
+get_invocation_meta = get_tool_meta
 
-def get_invocation_meta(widget: Widget) -> Dict[str, Any]:
-    """Return metadata for tool invocation results."""
+
+# Widgets are immutable, so their metadata only changes with BASE_URL.
+# The cached dicts are shared by every response; don't mutate them.
+@lru_cache(maxsize=256)
+def _ui_meta(widget: Widget, base_url: str) -> Dict[str, Any]:
     return {
         "ui": {
             "resourceUri": widget.template_uri,
-            "csp": get_csp_domains(),
+            "csp": _csp_domains_for(base_url),
         },
     }
 
 
+def _trim_property_schema(field_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the type, description and default of a property schema."""
+    prop = {"type": field_info.get("type", "string")}
+    if "description" in field_info:
+        prop["description"] = field_info["description"]
+    if "default" in field_info:
+        prop["default"] = field_info["default"]
+    return prop
+
+
+@lru_cache(maxsize=None)
 def get_tool_schema(input_model: type | None) -> Dict[str, Any]:
-    """Generate JSON Schema from the Pydantic model for a widget."""
+    """Generate JSON Schema from the Pydantic model for a widget.
+
+    Cached per model class; the returned dict is shared, so don't mutate it.
+    """
     if not input_model:
         return {"type": "object", "properties": {}, "additionalProperties": False}
 
-    # Generate schema from Pydantic model
-    pydantic_schema = input_model.model_json_schema()
-
     # Convert to MCP-compatible format (remove $defs and other extras)
-    properties = {}
-    for field_name, field_info in pydantic_schema.get("properties", {}).items():
-        prop = {"type": field_info.get("type", "string")}
-        if "description" in field_info:
-            prop["description"] = field_info["description"]
-        if "default" in field_info:
-            prop["default"] = field_info["default"]
-        properties[field_name] = prop
-
+    pydantic_schema = input_model.model_json_schema()
     return {
         "type": "object",
-        "properties": properties,
+        "properties": {
+            field_name: _trim_property_schema(field_info)
+            for field_name, field_info in pydantic_schema.get("properties", {}).items()
+        },
         "additionalProperties": False,
     }
 
 
+@lru_cache(maxsize=None)
+def _default_input(input_class: type[BaseModel]) -> BaseModel:
+    return input_class()
+
+
+def parse_input(input_class: type[ModelT], arguments: Dict[str, Any]) -> ModelT:
+    """Validate tool arguments against a widget's input model.
+
+    Calls with an empty dict (the common case) share one default instance per
+    model instead of running validation each time. That is only safe for
+    frozen models (ConfigDict(frozen=True)), so other models get a fresh
+    instance. Calls with arguments are validated by the model's core
+    validator, which raises ValidationError like model_validate.
+    """
+    if isinstance(arguments, dict) and not arguments and input_class.model_config.get("frozen"):
+        return _default_input(input_class)  # type: ignore[return-value]
+    # Straight into pydantic-core, skipping model_validate's Python wrapper
+    return input_class.__pydantic_validator__.validate_python(arguments)
+
+
+@lru_cache(maxsize=None)
+def _valid_fields(input_class: type) -> str:
+    """Comma-separated field names of an input model (fixed per class)."""
+    return ", ".join(input_class.model_fields)
+
+
 def format_validation_error(e: ValidationError, input_class: type) -> str:
     """Format Pydantic validation errors into actionable messages."""
-    errors = e.errors()
-    field_errors = []
-    for err in errors:
-        field = ".".join(str(x) for x in err["loc"]) if err["loc"] else "input"
-        msg = err["msg"]
-        field_errors.append(f"  - {field}: {msg}")
-
-    # Get valid field names from the model
-    valid_fields = list(input_class.model_fields.keys())
-
-    error_msg = f"Validation error. Issues:\n"
-    error_msg += "\n".join(field_errors)
-    error_msg += f"\n\nValid fields: {', '.join(valid_fields)}"
-    return error_msg
+    field_errors = "\n".join(
+        f"  - {'.'.join(map(str, err['loc'])) if err['loc'] else 'input'}: {err['msg']}"
+        for err in e.errors()
+    )
+    return f"Validation error. Issues:\n{field_errors}\n\nValid fields: {_valid_fields(input_class)}"
+
+
+def widget_result(widget: Widget, text: str, structured_content: Dict[str, Any]) -> types.ServerResult:
+    """Build the standard successful tool result for a widget."""
+    return types.ServerResult(types.CallToolResult(
+        content=[types.TextContent(type="text", text=text)],
+        structuredContent=structured_content,
+        _meta=get_invocation_meta(widget),
+    ))
+
+
+def validation_error_result(e: ValidationError, input_class: type) -> types.ServerResult:
+    """Build the error tool result for invalid widget arguments."""
+    return types.ServerResult(types.CallToolResult(
+        content=[types.TextContent(type="text", text=format_validation_error(e, input_class))],
+        isError=True,
+    ))
@@ -7,7 +7,7 @@ from typing import Any, Dict
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import Widget, parse_input, validation_error_result, widget_result
 
 WIDGET = Widget(
     identifier="show_card",
@@ -41,35 +41,30 @@ class CardInput(BaseModel):
     title: str = Field(default="Card Widget", description="Widget title")
     message: str = Field(default="Hello from the server!", description="Main message")
     accent_color: str = Field(default="#2563eb", alias="accentColor", description="Accent color (hex)")
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = CardInput
 
+# Static sample data lives at module level so every call shares it
+SAMPLE_CARD_ITEMS = [
+    {"id": "1", "name": "First Item", "description": "Sample item description"},
+    {"id": "2", "name": "Second Item", "description": "Another sample item"},
+    {"id": "3", "name": "Third Item", "description": "One more item"},
+]
+
 
 async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
     try:
-        payload = CardInput.model_validate(arguments)
+        payload = parse_input(CardInput, arguments)
     except ValidationError as e:
-        error_msg = format_validation_error(e, CardInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
+        return validation_error_result(e, CardInput)
 
     structured_content = {
         "title": payload.title,
         "message": payload.message,
         "accentColor": payload.accent_color,
-        "items": [
-            {"id": "1", "name": "First Item", "description": "Sample item description"},
-            {"id": "2", "name": "Second Item", "description": "Another sample item"},
-            {"id": "3", "name": "Third Item", "description": "One more item"},
-        ],
+        "items": SAMPLE_CARD_ITEMS,
     }
 
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"Card widget: {payload.title}")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"Card widget: {payload.title}", structured_content)
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, Literal
 
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import (
+    RESULT_CACHE_SIZE, Widget, get_base_url, parse_input, validation_error_result,
+    widget_result,
+)
 
 WIDGET = Widget(
     identifier="show_carousel",
@@ -50,7 +54,7 @@ class CarouselInput(BaseModel):
         default="restaurants",
         description="Category of items to show. Options: restaurants, hotels, products, attractions"
     )
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = CarouselInput
@@ -64,23 +68,22 @@ SAMPLE_CAROUSEL_ITEMS = [
 ]
 
 
-async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
-    try:
-        payload = CarouselInput.model_validate(arguments)
-    except ValidationError as e:
-        error_msg = format_validation_error(e, CarouselInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
-
+# Results depend only on the validated inputs and BASE_URL (via the CSP
+# metadata), so repeated calls reuse the same result object.
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _build_result(widget: Widget, title: str, base_url: str) -> types.ServerResult:
     structured_content = {
-        "title": payload.title,
+        "title": title,
         "items": SAMPLE_CAROUSEL_ITEMS,
     }
 
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"Carousel: {payload.title} ({len(SAMPLE_CAROUSEL_ITEMS)} items)")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"Carousel: {title} ({len(SAMPLE_CAROUSEL_ITEMS)} items)", structured_content)
+
+
+async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
+    try:
+        payload = parse_input(CarouselInput, arguments)
+    except ValidationError as e:
+        return validation_error_result(e, CarouselInput)
+
+    return _build_result(widget, payload.title, get_base_url())
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict
 
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import (
+    RESULT_CACHE_SIZE, Widget, get_base_url, parse_input, validation_error_result,
+    widget_result,
+)
 
 WIDGET = Widget(
     identifier="show_dashboard",
@@ -42,7 +46,7 @@ class DashboardInput(BaseModel):
     """Input for dashboard widget."""
     title: str = Field(default="Dashboard", description="Dashboard title")
     period: str = Field(default="Last 30 days", description="Time period")
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = DashboardInput
@@ -62,26 +66,25 @@ SAMPLE_ACTIVITIES = [
 ]
 
 
-async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
-    try:
-        payload = DashboardInput.model_validate(arguments)
-    except ValidationError as e:
-        error_msg = format_validation_error(e, DashboardInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
-
+# Results depend only on the validated inputs and BASE_URL (via the CSP
+# metadata), so repeated calls reuse the same result object.
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _build_result(widget: Widget, title: str, period: str, base_url: str) -> types.ServerResult:
     structured_content = {
-        "title": payload.title,
+        "title": title,
         "subtitle": "Your key metrics at a glance",
-        "period": payload.period,
+        "period": period,
         "stats": SAMPLE_DASHBOARD_STATS,
         "activities": SAMPLE_ACTIVITIES,
     }
 
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"Dashboard: {payload.title}")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"Dashboard: {title}", structured_content)
+
+
+async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
+    try:
+        payload = parse_input(DashboardInput, arguments)
+    except ValidationError as e:
+        return validation_error_result(e, DashboardInput)
+
+    return _build_result(widget, payload.title, payload.period, get_base_url())
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, Literal
 
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import (
+    RESULT_CACHE_SIZE, Widget, get_base_url, parse_input, validation_error_result,
+    widget_result,
+)
 
 WIDGET = Widget(
     identifier="show_list",
@@ -52,7 +56,7 @@ class ListInput(BaseModel):
         default="restaurants",
         description="Category of items. Options: restaurants, cafes, shops, attractions"
     )
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = ListInput
@@ -66,26 +70,25 @@ SAMPLE_LIST_ITEMS = [
 ]
 
 
-async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
-    try:
-        payload = ListInput.model_validate(arguments)
-    except ValidationError as e:
-        error_msg = format_validation_error(e, ListInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
-
+# Results depend only on the validated inputs and BASE_URL (via the CSP
+# metadata), so repeated calls reuse the same result object.
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _build_result(widget: Widget, title: str, subtitle: str, base_url: str) -> types.ServerResult:
     structured_content = {
-        "title": payload.title,
-        "subtitle": payload.subtitle,
+        "title": title,
+        "subtitle": subtitle,
         "headerImage": "https://images.unsplash.com/photo-1504674900247-0877df9cc836?w=200&h=200&fit=crop",
         "actionLabel": "Save List",
         "items": SAMPLE_LIST_ITEMS,
     }
 
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"List: {payload.title} ({len(SAMPLE_LIST_ITEMS)} items)")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"List: {title} ({len(SAMPLE_LIST_ITEMS)} items)", structured_content)
+
+
+async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
+    try:
+        payload = parse_input(ListInput, arguments)
+    except ValidationError as e:
+        return validation_error_result(e, ListInput)
+
+    return _build_result(widget, payload.title, payload.subtitle, get_base_url())
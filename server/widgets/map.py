@@ -7,7 +7,7 @@ from typing import Any, Dict, List
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import Widget, parse_input, validation_error_result, widget_result
 
 WIDGET = Widget(
     identifier="show_map",
@@ -43,7 +43,7 @@ class ShowMapInput(BaseModel):
     south: float = Field(default=51.3, description="Southern latitude (-90 to 90)")
     east: float = Field(default=0.3, description="Eastern longitude (-180 to 180)")
     north: float = Field(default=51.7, description="Northern latitude (-90 to 90)")
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = ShowMapInput
@@ -54,13 +54,9 @@ SAMPLE_MAP_PLACES: List[Dict[str, Any]] = []
 
 async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
     try:
-        payload = ShowMapInput.model_validate(arguments)
+        payload = parse_input(ShowMapInput, arguments)
     except ValidationError as e:
-        error_msg = format_validation_error(e, ShowMapInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
+        return validation_error_result(e, ShowMapInput)
 
     structured_content = {
         "west": payload.west,
@@ -69,10 +65,6 @@ async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResul
         "north": payload.north,
     }
 
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"Map: W:{payload.west:.4f} S:{payload.south:.4f} E:{payload.east:.4f} N:{payload.north:.4f}")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"Map: W:{payload.west:.4f} S:{payload.south:.4f} E:{payload.east:.4f} N:{payload.north:.4f}", structured_content)
 
 
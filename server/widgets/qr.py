@@ -10,7 +10,7 @@ import mcp.types as types
 import qrcode
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import Widget, get_invocation_meta, parse_input, validation_error_result
 
 WIDGET = Widget(
     identifier="show_qr",
@@ -47,7 +47,7 @@ class QrInput(BaseModel):
     error_correction: str = Field(default="M", alias="errorCorrection", description="Error correction: L(7%), M(15%), Q(25%), H(30%)")
     fill_color: str = Field(default="black", alias="fillColor", description="Foreground color (hex or name)")
     back_color: str = Field(default="white", alias="backColor", description="Background color (hex or name)")
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = QrInput
@@ -55,13 +55,9 @@ INPUT_MODEL = QrInput
 
 async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
     try:
-        payload = QrInput.model_validate(arguments)
+        payload = parse_input(QrInput, arguments)
     except ValidationError as e:
-        error_msg = format_validation_error(e, QrInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
+        return validation_error_result(e, QrInput)
 
     error_levels = {
         "L": qrcode.constants.ERROR_CORRECT_L,
@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 import math
-from copy import deepcopy
+from functools import lru_cache
 from typing import Any, Dict, List
 
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import (
+    RESULT_CACHE_SIZE, Widget, get_base_url, parse_input, validation_error_result,
+    widget_result,
+)
 
 WIDGET = Widget(
     identifier="get_scenario_data",
@@ -49,7 +52,7 @@ class ScenarioModelerInput(BaseModel):
     monthly_churn_rate: float = Field(default=3, alias="monthlyChurnRate", description="Monthly churn rate %")
     gross_margin: float = Field(default=80, alias="grossMargin", description="Gross margin %")
     fixed_costs: float = Field(default=30000, alias="fixedCosts", description="Fixed monthly costs")
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = ScenarioModelerInput
@@ -142,23 +145,23 @@ SCENARIO_DEFAULT_INPUTS = {
 }
 
 
-async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
-    try:
-        payload = ScenarioModelerInput.model_validate(arguments)
-    except ValidationError as e:
-        error_msg = format_validation_error(e, ScenarioModelerInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
-
+# The inputs are validated but don't shape the response, so the result only
+# depends on BASE_URL (via the CSP metadata).
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _build_result(widget: Widget, base_url: str) -> types.ServerResult:
+    # Sample data is shared, not copied: results are only serialized, never mutated
     structured_content = {
-        "templates": deepcopy(SCENARIO_TEMPLATES),
+        "templates": SCENARIO_TEMPLATES,
         "defaultInputs": SCENARIO_DEFAULT_INPUTS,
     }
 
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"SaaS Scenario Modeler ({len(SCENARIO_TEMPLATES)} templates)")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"SaaS Scenario Modeler ({len(SCENARIO_TEMPLATES)} templates)", structured_content)
+
+
+async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
+    try:
+        parse_input(ScenarioModelerInput, arguments)
+    except ValidationError as e:
+        return validation_error_result(e, ScenarioModelerInput)
+
+    return _build_result(widget, get_base_url())
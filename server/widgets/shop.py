@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
-from copy import deepcopy
+from functools import lru_cache
 from typing import Any, Dict
 
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import (
+    RESULT_CACHE_SIZE, Widget, get_base_url, parse_input, validation_error_result,
+    widget_result,
+)
 
 WIDGET = Widget(
     identifier="show_shop",
@@ -43,7 +46,7 @@ Example:
 class ShopInput(BaseModel):
     """Input for shop widget."""
     title: str = Field(default="Your Cart", description="Cart title")
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = ShopInput
@@ -103,24 +106,27 @@ SAMPLE_CART_ITEMS = [
 ]
 
 
-async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
-    try:
-        payload = ShopInput.model_validate(arguments)
-    except ValidationError as e:
-        error_msg = format_validation_error(e, ShopInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
+# Sample data is static, so its totals are computed once
+_CART_TOTAL_QTY = sum(item["quantity"] for item in SAMPLE_CART_ITEMS)
+
 
+# Results depend only on the validated inputs and BASE_URL (via the CSP
+# metadata), so repeated calls reuse the same result object.
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _build_result(widget: Widget, title: str, base_url: str) -> types.ServerResult:
+    # Sample data is shared, not copied: results are only serialized, never mutated
     structured_content = {
-        "title": payload.title,
-        "cartItems": deepcopy(SAMPLE_CART_ITEMS),
+        "title": title,
+        "cartItems": SAMPLE_CART_ITEMS,
     }
 
-    total_items = sum(item["quantity"] for item in SAMPLE_CART_ITEMS)
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"Shopping Cart: {total_items} items")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"Shopping Cart: {_CART_TOTAL_QTY} items", structured_content)
+
+
+async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
+    try:
+        payload = parse_input(ShopInput, arguments)
+    except ValidationError as e:
+        return validation_error_result(e, ShopInput)
+
+    return _build_result(widget, payload.title, get_base_url())
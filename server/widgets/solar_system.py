@@ -7,7 +7,7 @@ from typing import Any, Dict, Literal, Optional
 import mcp.types as types
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import Widget, parse_input, validation_error_result, widget_result
 
 WIDGET = Widget(
     identifier="show_solar_system",
@@ -48,7 +48,7 @@ class SolarSystemInput(BaseModel):
         description="Planet to focus on. Options: Mercury, Venus, Earth, Mars, Jupiter, Saturn, Uranus, Neptune"
     )
     title: str = Field(default="Solar System Explorer", description="Widget title")
-    model_config = ConfigDict(populate_by_name=True, extra="forbid")
+    model_config = ConfigDict(populate_by_name=True, extra="forbid", frozen=True)
 
 
 INPUT_MODEL = SolarSystemInput
@@ -56,13 +56,9 @@ INPUT_MODEL = SolarSystemInput
 
 async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
     try:
-        payload = SolarSystemInput.model_validate(arguments)
+        payload = parse_input(SolarSystemInput, arguments)
     except ValidationError as e:
-        error_msg = format_validation_error(e, SolarSystemInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
+        return validation_error_result(e, SolarSystemInput)
 
     structured_content = {
         "title": payload.title,
@@ -70,8 +66,4 @@ async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResul
     }
 
     planet_msg = f" (focusing on {payload.planet_name})" if payload.planet_name else ""
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"Solar System{planet_msg}")],
-        structuredContent=structured_content,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"Solar System{planet_msg}", structured_content)
@@ -11,7 +11,7 @@ import mcp.types as types
 import psutil
 from pydantic import BaseModel, ConfigDict, ValidationError
 
-from ._base import Widget, format_validation_error, get_invocation_meta
+from ._base import Widget, parse_input, validation_error_result, widget_result
 
 WIDGET = Widget(
     identifier="get_system_info",
@@ -43,7 +43,7 @@ Example:
 
 class SystemInfoInput(BaseModel):
     """Input for system monitor widget (no parameters needed)."""
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", frozen=True)
 
 
 INPUT_MODEL = SystemInfoInput
@@ -51,13 +51,9 @@ INPUT_MODEL = SystemInfoInput
 
 async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResult:
     try:
-        SystemInfoInput.model_validate(arguments)
+        parse_input(SystemInfoInput, arguments)
     except ValidationError as e:
-        error_msg = format_validation_error(e, SystemInfoInput)
-        return types.ServerResult(types.CallToolResult(
-            content=[types.TextContent(type="text", text=error_msg)],
-            isError=True,
-        ))
+        return validation_error_result(e, SystemInfoInput)
 
     info = {
         "hostname": socket.gethostname(),
@@ -71,11 +67,7 @@ async def handle(widget: Widget, arguments: Dict[str, Any]) -> types.ServerResul
         },
     }
 
-    return types.ServerResult(types.CallToolResult(
-        content=[types.TextContent(type="text", text=f"System: {info['hostname']} ({info['platform']})")],
-        structuredContent=info,
-        _meta=get_invocation_meta(widget),
-    ))
+    return widget_result(widget, f"System: {info['hostname']} ({info['platform']})", info)
 
 
 async def handle_poll_system_stats(arguments: Dict[str, Any]) -> types.ServerResult: